@@ -0,0 +1,153 @@
+"""Requests per second and latency of the purchase flow, WSGI vs ASGI.
+
+Starts the app under gunicorn (sync workers, core.wsgi) and then under
+uvicorn (core.asgi, async purchase views), each against the same throwaway
+database and a fake Paystack with injected latency. Concurrent clients then
+post initialize-payment requests for a fixed time.
+
+    python -m benchmarks.asgi_load --workers 2 --concurrency 50 --duration 10 --paystack-latency 0.2
+
+Both servers run with the same number of worker processes, so the
+difference is what a worker does while Paystack is slow.
+"""
+import argparse
+import asyncio
+import itertools
+import os
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+from urllib.parse import urlparse
+
+import aiohttp
+
+from benchmarks.common import TestDatabase, summarize
+from benchmarks.fake_paystack import FakePaystackServer
+
+from django.db import connection
+
+from events.models import Event, TicketType
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def database_url():
+    """DATABASE_URL for the test database the server processes should use."""
+    settings_dict = connection.settings_dict
+    if connection.vendor == "sqlite":
+        return f"sqlite:///{settings_dict['NAME']}"
+    parsed = urlparse(os.environ["DATABASE_URL"])
+    return parsed._replace(path=f"/{settings_dict['NAME']}").geturl()
+
+
+def server_command(mode, port, workers):
+    if mode == "wsgi":
+        return ["gunicorn", "core.wsgi:application", "--bind", f"127.0.0.1:{port}", "--workers", str(workers)]
+    return [
+        "uvicorn", "core.asgi:application", "--host", "127.0.0.1", "--port", str(port),
+        "--workers", str(workers), "--no-access-log", "--lifespan", "off",
+    ]
+
+
+def wait_for_port(port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.5).close()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"server on port {port} did not start")
+
+
+async def run_load(url, payload, concurrency, duration, buyer_prefix):
+    latencies, statuses = [], {}
+    deadline = time.monotonic() + duration
+    buyers = itertools.count()
+
+    async def client(session):
+        while time.monotonic() < deadline:
+            # Each purchase links an account to a new attendee, so every
+            # request needs its own buyer.
+            body = dict(payload, email=f"{buyer_prefix}{next(buyers)}@example.com")
+            start = time.perf_counter()
+            async with session.post(url, json=body) as response:
+                await response.read()
+            latencies.append(time.perf_counter() - start)
+            statuses[response.status] = statuses.get(response.status, 0) + 1
+
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    async with aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=60)) as session:
+        started = time.monotonic()
+        await asyncio.gather(*(client(session) for _ in range(concurrency)))
+        elapsed = time.monotonic() - started
+    return latencies, statuses, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=2, help="Server worker processes in both modes.")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=10, help="Seconds of load per mode.")
+    parser.add_argument("--paystack-latency", type=float, default=0.2)
+    parser.add_argument("--modes", nargs="+", default=["wsgi", "asgi"], choices=["wsgi", "asgi"])
+    args = parser.parse_args()
+
+    with TestDatabase(), FakePaystackServer(latency=args.paystack_latency) as paystack:
+        event = Event.objects.create(title="Load", date_time="Jan 1, 2026", venue="Arena", description="")
+        ticket_type = TicketType.objects.create(event=event, name="GA", price=100, limit=10_000_000)
+        payload = {
+            "event": str(event.id),
+            "ticket_type": str(ticket_type.id),
+            "full_name": "Load Tester",
+            "email": "load@example.com",
+            "age": 30,
+            "phone": "0",
+        }
+        env = dict(
+            os.environ,
+            DATABASE_URL=database_url(),
+            DJANGO_DEBUG="false",
+            DJANGO_SECURE_SSL_REDIRECT="false",
+            DJANGO_ALLOWED_HOSTS="127.0.0.1",
+            PAYSTACK_SECRET_KEY="sk_bench",
+            PAYSTACK_BASE_URL=paystack.url,
+            PAYSTACK_MAX_RETRIES="0",
+            # Every simulated buyer comes from 127.0.0.1.
+            THROTTLE_PURCHASE_IP="",
+            THROTTLE_PURCHASE_EMAIL="",
+            THROTTLE_PURCHASE_EVENT="",
+        )
+        connection.close()
+
+        for mode in args.modes:
+            port = free_port()
+            server = subprocess.Popen(
+                server_command(mode, port, args.workers),
+                cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=None if os.environ.get("BENCH_SERVER_LOGS") else subprocess.DEVNULL,
+            )
+            try:
+                wait_for_port(port)
+                url = f"http://127.0.0.1:{port}/api/tickets/initialize-payment/"
+                latencies, statuses, elapsed = asyncio.run(
+                    run_load(url, payload, args.concurrency, args.duration, buyer_prefix=mode)
+                )
+            finally:
+                server.terminate()
+                server.wait()
+            label = f"{mode} ({args.workers} workers, c={args.concurrency})"
+            print(f"{label:<40} {len(latencies) / elapsed:8.1f} req/s  statuses={statuses}")
+            summarize(f"  {mode} initialize-payment", latencies)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,47 @@
+"""Shared setup for the scripts in this directory.
+
+Benchmarks run against a throwaway test database, never ``db.sqlite3``.
+Run them from ``backend/``, e.g. ``python -m benchmarks.webhook_latency``.
+"""
+import os
+import statistics
+import time
+
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
+django.setup()
+
+from django.db import connection  # noqa: E402
+from django.test.utils import setup_test_environment, teardown_test_environment  # noqa: E402
+
+
+class TestDatabase:
+    """Context manager that creates and destroys a test database."""
+
+    def __enter__(self):
+        setup_test_environment()
+        self.old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        return self
+
+    def __exit__(self, *exc):
+        connection.creation.destroy_test_db(self.old_name, verbosity=0)
+        teardown_test_environment()
+        return False
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+def summarize(label, samples):
+    samples = sorted(samples)
+    p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+    print(
+        f"{label:<40} n={len(samples):<5} "
+        f"mean={statistics.mean(samples) * 1000:8.2f}ms "
+        f"p50={statistics.median(samples) * 1000:8.2f}ms "
+        f"p99={p99 * 1000:8.2f}ms"
+    )
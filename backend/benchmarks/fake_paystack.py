@@ -0,0 +1,71 @@
+"""A local stand-in for api.paystack.co with injectable latency and errors.
+
+Point ``PAYSTACK_BASE_URL`` at ``server.url``. Every initialize succeeds and
+every verify reports a successful charge, unless ``status`` is set, in which
+case every request gets that HTTP status. ``latency`` seconds pass before
+each reply.
+"""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class _PaystackHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        self.server.connections += 1
+
+    def _respond(self):
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        self.server.requests.append((self.command, self.path))
+        time.sleep(self.server.latency)
+        if self.server.status:
+            code, body = self.server.status, {"status": False, "message": "unavailable"}
+        elif self.path.startswith("/transaction/initialize"):
+            code, body = 200, {"status": True, "data": {"authorization_url": "https://checkout.paystack.test/abc"}}
+        else:
+            reference = self.path.rsplit("/", 1)[-1]
+            code, body = 200, {"status": True, "data": {"status": "success", "reference": reference}}
+        content = json.dumps(body).encode()
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    do_GET = do_POST = _respond
+
+    def log_message(self, *args):
+        pass
+
+
+class FakePaystackServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, latency=0, host="127.0.0.1", port=0):
+        super().__init__((host, port), _PaystackHandler)
+        self.latency = latency
+        self.status = None
+        self.requests = []
+        self.connections = 0
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def handle_error(self, request, client_address):
+        # Clients that timed out have hung up by the time a slow reply is written.
+        pass
+
+    def __enter__(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+        self.server_close()
+        return False
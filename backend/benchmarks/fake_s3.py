@@ -0,0 +1,111 @@
+"""A local stand-in for an S3-compatible bucket (think MinIO), in memory.
+
+Handles path-style PutObject, GetObject, HeadObject and DeleteObject, which
+is all ``S3Storage`` needs to save, open, check and delete media. Requests
+are not authenticated. Point ``endpoint_url`` at ``server.url`` with
+``addressing_style="path"``.
+"""
+import hashlib
+import threading
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote, urlparse
+
+_KEPT_HEADERS = ("Content-Type", "Cache-Control", "Content-Disposition")
+
+
+def _decode_aws_chunked(body):
+    """Strip aws-chunked framing (``<hex size>[;ext]\\r\\n<data>\\r\\n``...)."""
+    data = bytearray()
+    while body:
+        header, _, body = body.partition(b"\r\n")
+        size = int(header.split(b";")[0], 16)
+        if size == 0:
+            break
+        data += body[:size]
+        body = body[size + 2:]
+    return bytes(data)
+
+
+class _S3Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def _key(self):
+        return unquote(urlparse(self.path).path.lstrip("/"))
+
+    def _send(self, code, body=b"", headers=()):
+        self.send_response(code)
+        for name, value in headers:
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+
+    def _not_found(self):
+        self._send(404, b"<Error><Code>NoSuchKey</Code></Error>", [("Content-Type", "application/xml")])
+
+    def do_PUT(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        if "aws-chunked" in (self.headers.get("Content-Encoding") or ""):
+            body = _decode_aws_chunked(body)
+        etag = f'"{hashlib.md5(body).hexdigest()}"'
+        headers = {name: self.headers[name] for name in _KEPT_HEADERS if self.headers.get(name)}
+        with self.server.lock:
+            self.server.objects[self._key()] = (body, etag, formatdate(usegmt=True), headers)
+        self.server.requests.append(("PUT", self._key()))
+        self._send(200, headers=[("ETag", etag)])
+
+    def _object(self):
+        with self.server.lock:
+            return self.server.objects.get(self._key())
+
+    def do_GET(self):
+        self.server.requests.append((self.command, self._key()))
+        stored = self._object()
+        if stored is None:
+            return self._not_found()
+        body, etag, modified, headers = stored
+        self._send(200, body, [("ETag", etag), ("Last-Modified", modified), *headers.items()])
+
+    do_HEAD = do_GET
+
+    def do_DELETE(self):
+        with self.server.lock:
+            self.server.objects.pop(self._key(), None)
+        self.server.requests.append(("DELETE", self._key()))
+        self._send(204)
+
+    def log_message(self, *args):
+        pass
+
+
+class FakeS3Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, host="127.0.0.1", port=0):
+        super().__init__((host, port), _S3Handler)
+        self.objects = {}
+        self.requests = []
+        self.lock = threading.Lock()
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def handle_error(self, request, client_address):
+        pass
+
+    def headers(self, bucket, key):
+        """Headers stored with an object, e.g. its Cache-Control."""
+        return self.objects[f"{bucket}/{key}"][3]
+
+    def __enter__(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+        self.server_close()
+        return False
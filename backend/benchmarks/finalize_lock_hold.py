@@ -0,0 +1,105 @@
+"""Lock hold time of _finalize_ticket_payment versus order quantity.
+
+"Ticket rows" is measured from the first statement of the transaction
+(the SELECT ... FOR UPDATE on the order) to its commit. "TicketType row"
+is measured from the first statement that touches events_tickettype to the
+commit, which is how long every other buyer of that ticket type waits.
+The pre-bulk implementation is reproduced as ``legacy_finalize`` for
+comparison.
+
+    python -m benchmarks.finalize_lock_hold --rounds 20
+"""
+import argparse
+import time
+import uuid
+
+from benchmarks.common import TestDatabase, summarize
+
+from django.db import connection, transaction
+from django.db.models import F
+
+from events.models import Attendee, Event, Ticket, TicketType
+from events.reservations import reserve_seats
+from events.views import _finalize_ticket_payment
+
+
+def legacy_finalize(reference):
+    with transaction.atomic():
+        tickets = Ticket.objects.select_for_update().filter(payment_ref=reference)
+        if not tickets.exists() or tickets[0].status == "paid":
+            return
+        ticket_type = TicketType.objects.select_for_update().get(id=tickets[0].ticket_type_id)
+        quantity = tickets.count()
+        if ticket_type.sold_count + quantity > ticket_type.limit:
+            for ticket in tickets:
+                ticket.status = "cancelled"
+                ticket.save()
+            return
+        for ticket in tickets:
+            ticket.status = "paid"
+            ticket.save()
+        ticket_type.sold_count = F("sold_count") + quantity
+        ticket_type.save(update_fields=["sold_count"])
+
+
+class LockTimer:
+    def __init__(self):
+        self.started = self.type_locked = self.committed = None
+        self.queries = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        now = time.perf_counter()
+        if sql == "BEGIN":
+            return execute(sql, params, many, context)
+        if self.started is None:
+            self.started = now
+            transaction.on_commit(self._on_commit)
+        if self.type_locked is None and "events_tickettype" in sql:
+            self.type_locked = now
+        self.queries += 1
+        return execute(sql, params, many, context)
+
+    def _on_commit(self):
+        self.committed = time.perf_counter()
+
+
+def measure(finalize, ticket_type, attendee, quantity, reserve):
+    reference = f"PSK-{uuid.uuid4().hex[:12].upper()}"
+    Ticket.objects.bulk_create([
+        Ticket(event_id=ticket_type.event_id, ticket_type=ticket_type, attendee=attendee, payment_ref=reference)
+        for _ in range(quantity)
+    ])
+    if reserve:
+        reserve_seats(ticket_type.id, quantity, reference)
+    timer = LockTimer()
+    with connection.execute_wrapper(timer):
+        finalize(reference)
+    return timer
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--quantities", default="1,2,5,10")
+    args = parser.parse_args()
+    quantities = [int(q) for q in args.quantities.split(",")]
+
+    with TestDatabase():
+        event = Event.objects.create(title="Bench", date_time="Jan 1, 2026", venue="Hall", description="")
+        ticket_type = TicketType.objects.create(event=event, name="GA", price=100, limit=10**9)
+        attendee = Attendee.objects.create(full_name="Buyer", email="buyer@example.com", age=30, phone="0")
+
+        for label, finalize, reserve in (
+            ("legacy", legacy_finalize, False),
+            ("bulk", _finalize_ticket_payment, True),
+        ):
+            print(f"\n{label} finalize")
+            for quantity in quantities:
+                timers = [measure(finalize, ticket_type, attendee, quantity, reserve) for _ in range(args.rounds)]
+                print(f"  quantity={quantity:<3} queries={timers[0].queries}")
+                summarize("    ticket rows locked", [t.committed - t.started for t in timers])
+                summarize("    TicketType row locked", [t.committed - t.type_locked for t in timers])
+
+
+if __name__ == "__main__":
+    main()
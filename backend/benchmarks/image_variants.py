@@ -0,0 +1,59 @@
+"""Flyer bytes per catalogue page: originals vs the resized variants.
+
+Renders ``--count`` synthetic 12-megapixel photos (smooth shapes plus
+grain, so they compress roughly like real photos rather than flat colour) and compares what a client
+downloads for a page of them: the uploaded original, or the variant a
+phone would pick from ``flyer_srcset`` at ``--display-width`` pixels.
+
+    python -m benchmarks.image_variants --count 10 --display-width 640
+"""
+import argparse
+import io
+import time
+
+import benchmarks.common  # noqa: F401  (configures Django)
+
+from django.conf import settings
+from PIL import Image
+
+from events.images import render_variants
+
+
+def photo(seed, size=(4032, 3024)):
+    # Smooth shapes from upscaled coarse noise, plus sensor-like grain.
+    coarse = [Image.effect_noise((size[0] // 32, size[1] // 32), 60 + seed % 7 + 10 * i) for i in range(3)]
+    shapes = Image.merge("RGB", coarse).resize(size, Image.Resampling.BICUBIC)
+    grain = Image.merge("RGB", [Image.effect_noise(size, 20) for _ in range(3)])
+    buffer = io.BytesIO()
+    Image.blend(shapes, grain, 0.15).save(buffer, format="JPEG", quality=90)
+    return buffer.getvalue()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--count", type=int, default=10)
+    parser.add_argument("--display-width", type=int, default=640)
+    args = parser.parse_args()
+
+    originals = webp = jpeg = 0
+    elapsed = 0.0
+    for seed in range(args.count):
+        data = photo(seed)
+        start = time.perf_counter()
+        _, _, variants = render_variants(data, settings.IMAGE_VARIANT_WIDTHS, settings.IMAGE_VARIANT_QUALITY)
+        elapsed += time.perf_counter() - start
+        originals += len(data)
+        widths = sorted({width for width, _, _ in variants})
+        chosen = next((w for w in widths if w >= args.display_width), widths[-1])
+        webp += sum(len(content) for width, fmt, content in variants if width == chosen and fmt == "webp")
+        jpeg += sum(len(content) for width, fmt, content in variants if width == chosen and fmt == "jpeg")
+
+    print(f"{args.count} flyers, {args.display_width}px display, widths {settings.IMAGE_VARIANT_WIDTHS}\n")
+    print(f"{'originals':<12} {originals / 1024:10.0f} KiB")
+    for label, size in [("webp", webp), ("jpeg", jpeg)]:
+        print(f"{label:<12} {size / 1024:10.0f} KiB  ({originals / size:5.1f}x smaller)")
+    print(f"\nprocessing: {elapsed / args.count * 1000:.0f} ms per upload")
+
+
+if __name__ == "__main__":
+    main()
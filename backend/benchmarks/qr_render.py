@@ -0,0 +1,55 @@
+"""QR render throughput: in-process vs the process pool.
+
+Renders ``--count`` distinct ticket codes in each format, first one by one
+in this process, then through ``render_qr_codes`` with a pool of each size
+in ``--workers``. Images go to a scratch MEDIA_ROOT, so the pool runs
+include storing them.
+
+    python -m benchmarks.qr_render --count 500 --workers 1 2 4
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+import benchmarks.common  # noqa: F401  (configures Django)
+
+from django.test import override_settings
+
+from events import qr
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--count", type=int, default=500)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, os.cpu_count() or 4])
+    args = parser.parse_args()
+
+    print(f"{args.count} codes x png+svg on {os.cpu_count()} CPUs\n")
+    for fmt in qr.QR_FORMATS:
+        start = time.perf_counter()
+        for i in range(args.count):
+            qr.render_qr(f"TKT-S{i:07d}", fmt)
+        elapsed = time.perf_counter() - start
+        print(f"{'in-process ' + fmt:<28} {args.count / elapsed:8.1f} images/s")
+
+    for workers in args.workers:
+        media_root = tempfile.mkdtemp()
+        try:
+            with override_settings(MEDIA_ROOT=media_root, QR_RENDER_WORKERS=workers, QR_INLINE_MAX=0):
+                qr._pool = None
+                qr._get_pool().submit(int).result()  # start the workers outside the timing
+                values = [f"TKT-W{workers}-{i:07d}" for i in range(args.count)]
+                start = time.perf_counter()
+                rendered = qr.render_qr_codes(values)
+                elapsed = time.perf_counter() - start
+                qr._get_pool().shutdown()
+                qr._pool = None
+        finally:
+            shutil.rmtree(media_root, ignore_errors=True)
+        print(f"{f'pool, {workers} workers, stored':<28} {rendered / elapsed:8.1f} images/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""A minimal SMTP server that sleeps before every reply.
+
+Stands in for a slow mail provider so benchmarks can show how much of a
+request is spent waiting on SMTP.
+"""
+import socketserver
+import threading
+import time
+
+
+class _SlowSMTPHandler(socketserver.StreamRequestHandler):
+    def reply(self, line):
+        time.sleep(self.server.delay)
+        self.wfile.write(f"{line}\r\n".encode())
+
+    def handle(self):
+        self.server.connections += 1
+        self.reply("220 slow-smtp ready")
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode(errors="replace").strip().upper()
+            if command.startswith("EHLO") or command.startswith("HELO"):
+                self.reply("250 slow-smtp")
+            elif command == "DATA":
+                self.reply("354 end with <CRLF>.<CRLF>")
+                while self.rfile.readline() not in (b".\r\n", b".\n", b""):
+                    pass
+                self.server.messages += 1
+                self.reply("250 queued")
+            elif command == "QUIT":
+                self.reply("221 bye")
+                return
+            else:
+                self.reply("250 ok")
+
+
+class SlowSMTPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, delay=0.05, host="127.0.0.1", port=0):
+        super().__init__((host, port), _SlowSMTPHandler)
+        self.delay = delay
+        self.connections = 0
+        self.messages = 0
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+    def __enter__(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+        self.server_close()
+        return False
@@ -0,0 +1,52 @@
+"""Cost of a purchase throttle decision, per bucket store.
+
+Sends ``--requests`` initialize-payment requests from one address through
+``PurchaseThrottle.allow_request`` with each THROTTLE_STORE. The address is
+allowed one purchase a minute, so all but the first are refused: the path
+a client hammering the endpoint takes. Only the throttle is timed, not the
+rest of the view.
+
+    python -m benchmarks.throttle_decision --requests 20000
+"""
+import argparse
+import time
+
+import benchmarks.common  # noqa: F401  (configures Django)
+
+from django.core.cache import cache
+from django.test import override_settings
+from rest_framework.parsers import JSONParser
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from benchmarks.common import summarize
+from events import throttling
+
+STORES = ["events.throttling.LocalBucketStore", "events.throttling.CacheBucketStore"]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=20000)
+    args = parser.parse_args()
+
+    factory = APIRequestFactory()
+    body = {"event": "00000000-0000-0000-0000-000000000001", "email": "kofi@example.com"}
+    for path in STORES:
+        with override_settings(THROTTLE_STORE=path, THROTTLE_RATES={"purchase_ip": "1/min"}):
+            cache.clear()
+            throttling._store = None
+            throttle = throttling.PurchaseThrottle()
+            samples = []
+            refused = 0
+            for _ in range(args.requests):
+                request = Request(factory.post("/", body, format="json"), parsers=[JSONParser()])
+                start = time.perf_counter()
+                allowed = throttle.allow_request(request, None)
+                samples.append(time.perf_counter() - start)
+                refused += not allowed
+        summarize(f"{path.rsplit('.', 1)[1]} ({refused} refused)", samples)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""Thousands of buyers hitting one on-sale, with and without the waiting room.
+
+Starts the app under uvicorn against a throwaway database and a fake
+Paystack, then simulates ``--buyers`` buyers arriving within
+``--arrival`` seconds. In the "direct" run every buyer posts
+initialize-payment as soon as they arrive. In the "queued" run the event
+has ``admission_rate=--rate``: buyers join the waiting room, poll until
+admitted and only then post initialize-payment.
+
+    python -m benchmarks.waiting_room --buyers 2000 --rate 600
+
+Reported per run: purchase outcomes by status, purchase latency, how long
+buyers waited in line, and the time until every buyer was served. The
+server runs one worker by default, so the waiting room's counter is in
+LocMemCache, whose incr is atomic. With ``--workers`` above 1 the workers
+share a FileBasedCache, whose incr is not: places get handed out twice and
+buyers are let in faster than ``--rate``.
+"""
+import argparse
+import asyncio
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+import aiohttp
+
+from benchmarks.asgi_load import BACKEND_DIR, database_url, free_port, server_command, wait_for_port
+from benchmarks.common import TestDatabase, summarize
+from benchmarks.fake_paystack import FakePaystackServer
+
+from django.db import connection
+
+from events.models import Event, TicketType
+
+
+async def buyer(session, base_url, payload, arrival, queued, results):
+    await asyncio.sleep(arrival)
+    headers = {}
+    arrived = time.perf_counter()
+    if queued:
+        async with session.post(f"{base_url}/events/{payload['event']}/queue/") as response:
+            status = await response.json()
+        results["queue_requests"] += 1
+        queue_token = status.get("queue_token")
+        while not status["admitted"]:
+            await asyncio.sleep(status["poll_after"])
+            async with session.get(
+                f"{base_url}/events/{payload['event']}/queue/", params={"token": queue_token}
+            ) as response:
+                status = await response.json()
+            results["queue_requests"] += 1
+        headers["X-Admission-Token"] = status["admission_token"]
+    results["waits"].append(time.perf_counter() - arrived)
+
+    start = time.perf_counter()
+    try:
+        async with session.post(f"{base_url}/tickets/initialize-payment/", json=payload, headers=headers) as response:
+            await response.read()
+            code = response.status
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        code = type(e).__name__
+    results["latencies"].append(time.perf_counter() - start)
+    results["statuses"][code] = results["statuses"].get(code, 0) + 1
+
+
+async def simulate(base_url, event, ticket_type, args, queued):
+    results = {"latencies": [], "waits": [], "statuses": {}, "queue_requests": 0}
+    rng = random.Random(42)
+    # Every buyer is a browser of their own, so connections are not reused.
+    connector = aiohttp.TCPConnector(limit=args.connections, force_close=True)
+    async with aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=120)) as session:
+        started = time.monotonic()
+        await asyncio.gather(*(
+            buyer(session, base_url, {
+                "event": str(event.id),
+                "ticket_type": str(ticket_type.id),
+                "full_name": "Sim Buyer",
+                "email": f"{'q' if queued else 'd'}{i}@example.com",
+                "age": 30,
+                "phone": "0",
+            }, rng.uniform(0, args.arrival), queued, results)
+            for i in range(args.buyers)
+        ))
+        results["elapsed"] = time.monotonic() - started
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--buyers", type=int, default=2000)
+    parser.add_argument("--arrival", type=float, default=2, help="Seconds over which buyers arrive.")
+    parser.add_argument("--rate", type=int, default=600, help="Waiting room admissions per minute.")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--connections", type=int, default=1000, help="Client connection pool size.")
+    parser.add_argument("--paystack-latency", type=float, default=0.2)
+    parser.add_argument("--modes", nargs="+", default=["direct", "queued"], choices=["direct", "queued"])
+    args = parser.parse_args()
+
+    with TestDatabase(), FakePaystackServer(latency=args.paystack_latency) as paystack, \
+            tempfile.TemporaryDirectory() as cache_dir:
+        env = dict(
+            os.environ,
+            DATABASE_URL=database_url(),
+            DJANGO_DEBUG="false",
+            DJANGO_SECURE_SSL_REDIRECT="false",
+            DJANGO_ALLOWED_HOSTS="127.0.0.1",
+            PAYSTACK_SECRET_KEY="sk_bench",
+            PAYSTACK_BASE_URL=paystack.url,
+            PAYSTACK_MAX_RETRIES="0",
+            # Every simulated buyer comes from 127.0.0.1.
+            THROTTLE_PURCHASE_IP="",
+            THROTTLE_PURCHASE_EMAIL="",
+            THROTTLE_PURCHASE_EVENT="",
+        )
+        if args.workers > 1:
+            env.update(
+                CACHE_BACKEND="django.core.cache.backends.filebased.FileBasedCache",
+                CACHE_LOCATION=os.path.join(cache_dir, "default"),
+                WAITING_ROOM_CACHE_BACKEND="django.core.cache.backends.filebased.FileBasedCache",
+                WAITING_ROOM_CACHE_LOCATION=os.path.join(cache_dir, "waiting-room"),
+            )
+        for mode in args.modes:
+            queued = mode == "queued"
+            event = Event.objects.create(
+                title=f"Sim {mode}", date_time="Jan 1, 2026", venue="Arena", description="",
+                admission_rate=args.rate if queued else None,
+            )
+            ticket_type = TicketType.objects.create(event=event, name="GA", price=100, limit=10_000_000)
+            connection.close()
+
+            port = free_port()
+            server = subprocess.Popen(
+                server_command("asgi", port, args.workers),
+                cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL,
+                stderr=None if os.environ.get("BENCH_SERVER_LOGS") else subprocess.DEVNULL,
+            )
+            try:
+                wait_for_port(port)
+                results = asyncio.run(simulate(f"http://127.0.0.1:{port}/api", event, ticket_type, args, queued))
+            finally:
+                server.terminate()
+                server.wait()
+
+            label = f"{mode} ({args.buyers} buyers, {args.workers} workers)"
+            print(f"{label:<40} all served in {results['elapsed']:6.1f}s  statuses={results['statuses']}"
+                  + (f"  queue requests={results['queue_requests']}" if queued else ""))
+            summarize(f"  {mode} initialize-payment", results["latencies"])
+            if queued:
+                summarize("  time in the waiting room", results["waits"])
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
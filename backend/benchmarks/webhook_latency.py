@@ -0,0 +1,100 @@
+"""Webhook latency with a deliberately slow SMTP server.
+
+Compares the old inline path (finalize + SMTP send inside the request),
+the outbox path (finalize + enqueue) and the inbox path (the request only
+stores the delivery), then drains the outbox over a single SMTP
+connection. Finalizing is done by ``process_inbox`` in every case.
+
+    python -m benchmarks.webhook_latency --orders 50 --smtp-delay 0.05
+"""
+import argparse
+import hashlib
+import hmac
+import json
+import uuid
+
+from benchmarks.common import TestDatabase, summarize, timed
+from benchmarks.slow_smtp import SlowSMTPServer
+
+from django.core.mail import get_connection
+from django.test import Client, override_settings
+
+from events.models import Attendee, Event, Notification, Ticket, TicketType
+from events.notifications import drain_outbox
+from events.webhooks import process_inbox
+
+SECRET = "bench-secret"
+
+
+def make_orders(count):
+    event = Event.objects.create(title="Bench", date_time="Jan 1, 2026", venue="Hall", description="")
+    ticket_type = TicketType.objects.create(event=event, name="GA", price=100, limit=count * 10)
+    refs = []
+    for i in range(count):
+        attendee = Attendee.objects.create(full_name=f"Buyer {i}", email=f"buyer{i}@example.com", age=30, phone="0")
+        ref = f"PSK-{uuid.uuid4().hex[:12].upper()}"
+        Ticket.objects.create(event=event, ticket_type=ticket_type, attendee=attendee, payment_ref=ref)
+        refs.append(ref)
+    return refs
+
+
+def post_webhook(client, reference):
+    body = json.dumps({"event": "charge.success", "data": {"reference": reference}}).encode()
+    signature = hmac.new(SECRET.encode(), body, hashlib.sha512).hexdigest()
+    response = client.post(
+        "/api/payments/webhook/", body, content_type="application/json", HTTP_X_PAYSTACK_SIGNATURE=signature
+    )
+    assert response.status_code == 200, response.content
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--orders", type=int, default=50)
+    parser.add_argument("--smtp-delay", type=float, default=0.05, help="Seconds the SMTP server waits before each reply.")
+    args = parser.parse_args()
+
+    with TestDatabase(), SlowSMTPServer(delay=args.smtp_delay) as smtp, override_settings(
+        EMAIL_BACKEND="django.core.mail.backends.smtp.EmailBackend",
+        EMAIL_HOST="127.0.0.1",
+        EMAIL_PORT=smtp.port,
+        EMAIL_USE_TLS=False,
+        EMAIL_HOST_USER="bench@example.com",
+        EMAIL_HOST_PASSWORD="",
+        PAYSTACK_WEBHOOK_SECRET=SECRET,
+    ):
+        client = Client()
+        print(f"SMTP stand-in delay per reply: {args.smtp_delay * 1000:.0f}ms, orders: {args.orders}\n")
+
+        # Old behaviour: the webhook does not return until SMTP is done.
+        inline = []
+        for ref in make_orders(args.orders):
+            elapsed, _ = timed(lambda: (post_webhook(client, ref), process_inbox(), drain_outbox(connection=get_connection())))
+            inline.append(elapsed)
+        summarize("webhook, inline SMTP send", inline)
+
+        # Outbox: finalizing only enqueues the email.
+        queued = []
+        for ref in make_orders(args.orders):
+            elapsed, _ = timed(lambda: (post_webhook(client, ref), process_inbox()))
+            queued.append(elapsed)
+        summarize("webhook, finalize + enqueue", queued)
+
+        # Inbox: the request only records the delivery.
+        recorded = []
+        for ref in make_orders(args.orders):
+            elapsed, _ = timed(post_webhook, client, ref)
+            recorded.append(elapsed)
+        summarize("webhook, inbox only", recorded)
+        process_inbox(batch_size=args.orders)
+
+        pending = Notification.objects.filter(status="pending").count()
+        connections_before = smtp.connections
+        elapsed, result = timed(drain_outbox, batch_size=pending)
+        print(
+            f"\nworker drained {result['sent']} messages in {elapsed * 1000:.0f}ms "
+            f"over {smtp.connections - connections_before} SMTP connection(s)"
+        )
+
+
+if __name__ == "__main__":
+    main()
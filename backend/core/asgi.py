@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+# Route the purchase and login endpoints to their async views.
+os.environ.setdefault('DJANGO_ASYNC_VIEWS', 'true')
 
 application = get_asgi_application()
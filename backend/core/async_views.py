@@ -0,0 +1,55 @@
+"""Async version of ``google_login``, served under ASGI (see ``events.async_views``)."""
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.http import JsonResponse
+from django.utils import timezone
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from events.async_views import request_data
+
+from .google_tokens import verify_id_token
+
+
+@csrf_exempt
+@require_POST
+async def google_login(request):
+    data = request_data(request)
+    credential = data.get("credential") if data else None
+    if not credential:
+        return JsonResponse({"error": "Missing credential"}, status=400)
+
+    try:
+        # Verification is local except when Google's keys need refreshing,
+        # which is a blocking fetch, so it runs on a worker thread.
+        payload = await sync_to_async(verify_id_token, thread_sensitive=False)(
+            credential, settings.GOOGLE_CLIENT_ID or None
+        )
+    except Exception:
+        return JsonResponse({"error": "Invalid Google token"}, status=400)
+
+    email = payload.get("email")
+    if not email:
+        return JsonResponse({"error": "Email not available"}, status=400)
+
+    user, created = await User.objects.aget_or_create(
+        email=email,
+        defaults={
+            "username": email,
+            "first_name": payload.get("given_name", ""),
+            "last_name": payload.get("family_name", ""),
+        },
+    )
+    user.last_login = timezone.now()
+    if created:
+        user.set_unusable_password()
+    await user.asave(update_fields=["last_login", "password"] if created else ["last_login"])
+
+    refresh = RefreshToken.for_user(user)
+    return JsonResponse({
+        "access": str(refresh.access_token),
+        "refresh": str(refresh),
+        "email": user.email,
+    })
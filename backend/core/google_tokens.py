@@ -0,0 +1,102 @@
+"""Google ID-token verification against a cached copy of Google's keys.
+
+Google's signing keys (a JWKS) are fetched once and kept for as long as
+the response's ``Cache-Control: max-age`` allows. Every token is then
+verified locally, so in the steady state a login makes no network calls.
+A token signed with a ``kid`` we have not seen triggers one early refresh,
+which picks up key rotation; refreshes for unknown kids are rate limited so
+junk tokens cannot make us hammer Google.
+"""
+import re
+import threading
+import time
+
+import jwt
+import requests
+from django.conf import settings
+
+ISSUERS = ["accounts.google.com", "https://accounts.google.com"]
+
+# Used when the certs response carries no usable max-age.
+DEFAULT_MAX_AGE = 3600
+
+# Unknown kids cause at most one refresh per this many seconds.
+MIN_REFRESH_INTERVAL = 60
+
+_MAX_AGE = re.compile(r"max-age=(\d+)")
+
+
+class InvalidGoogleToken(Exception):
+    pass
+
+
+def _max_age(response):
+    match = _MAX_AGE.search(response.headers.get("Cache-Control", ""))
+    if match is None:
+        return DEFAULT_MAX_AGE
+    age = int(response.headers.get("Age", 0) or 0)
+    return max(int(match.group(1)) - age, 0)
+
+
+class GoogleTokenVerifier:
+    def __init__(self, certs_url=None, session=None):
+        self.certs_url = certs_url
+        self.session = session or requests.Session()
+        self.keys = {}
+        self.expires_at = 0
+        self.fetched_at = None
+        self._lock = threading.Lock()
+
+    def _refresh(self):
+        response = self.session.get(self.certs_url or settings.GOOGLE_CERTS_URL, timeout=5)
+        response.raise_for_status()
+        keys = {}
+        for jwk in response.json().get("keys", []):
+            if jwk.get("kid"):
+                keys[jwk["kid"]] = jwt.PyJWK(jwk, algorithm=jwk.get("alg", "RS256"))
+        now = time.monotonic()
+        self.keys = keys
+        self.fetched_at = now
+        self.expires_at = now + _max_age(response)
+
+    def _key(self, kid):
+        now = time.monotonic()
+        if now < self.expires_at and kid in self.keys:
+            return self.keys[kid]
+        with self._lock:
+            now = time.monotonic()
+            stale = now >= self.expires_at
+            rotated = kid not in self.keys and (self.fetched_at is None or now - self.fetched_at >= MIN_REFRESH_INTERVAL)
+            if stale or rotated:
+                self._refresh()
+        key = self.keys.get(kid)
+        if key is None:
+            raise InvalidGoogleToken(f"Unknown signing key {kid!r}")
+        return key
+
+    def verify(self, token, audience=None):
+        """Return the claims of a valid Google ID token, or raise InvalidGoogleToken.
+
+        ``audience`` is the OAuth client id the token must be issued for;
+        None skips that check.
+        """
+        try:
+            kid = jwt.get_unverified_header(token).get("kid")
+            return jwt.decode(
+                token,
+                self._key(kid),
+                algorithms=["RS256"],
+                audience=audience,
+                issuer=ISSUERS,
+                options={"verify_aud": audience is not None},
+                leeway=settings.GOOGLE_TOKEN_LEEWAY_SECONDS,
+            )
+        except jwt.PyJWTError as e:
+            raise InvalidGoogleToken(str(e)) from e
+
+
+verifier = GoogleTokenVerifier()
+
+
+def verify_id_token(token, audience=None):
+    return verifier.verify(token, audience)
@@ -0,0 +1,84 @@
+"""Responses for stored media files.
+
+With media on the local filesystem, Django only decides what to send: in
+the "x-accel" and "x-sendfile" modes (MEDIA_SERVE) the response names the
+file in a header and the front web server streams it, so no Python worker
+is tied up sending bytes. With media in a bucket the response is a
+redirect to the object's URL. Either way the response carries an ETag,
+Last-Modified where known, and an immutable Cache-Control.
+"""
+import mimetypes
+import os
+import stat
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files.storage import default_storage
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseRedirect
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+
+def cache_control():
+    return f"public, max-age={settings.MEDIA_CACHE_MAX_AGE}, immutable"
+
+
+def _local_path(name):
+    """Filesystem path of ``name``, or None when storage is remote."""
+    try:
+        return default_storage.path(name)
+    except NotImplementedError:
+        return None
+    except SuspiciousFileOperation:
+        raise Http404("Media not found")
+
+
+def _sendfile_response(name, path, content_type):
+    if settings.MEDIA_SERVE == "x-accel":
+        response = HttpResponse(content_type=content_type)
+        response["X-Accel-Redirect"] = quote(settings.MEDIA_ACCEL_PREFIX + name.lstrip("/"))
+    elif settings.MEDIA_SERVE == "x-sendfile":
+        response = HttpResponse(content_type=content_type)
+        response["X-Sendfile"] = path
+    else:
+        response = FileResponse(open(path, "rb"), content_type=content_type)
+    return response
+
+
+def media_response(request, name, content_type=None, etag=None):
+    """Serve the stored file ``name``.
+
+    Pass ``etag`` when it is known without touching storage (e.g. for
+    content-addressed files) so revalidations are answered without a stat;
+    otherwise it is derived from the file's mtime and size.
+    """
+    if etag is not None:
+        not_modified = get_conditional_response(request, etag=etag)
+        if not_modified is not None:
+            not_modified["Cache-Control"] = cache_control()
+            return not_modified
+
+    path = _local_path(name)
+    if path is None:
+        response = HttpResponseRedirect(default_storage.url(name))
+        response["Cache-Control"] = cache_control()
+        return response
+
+    try:
+        info = os.stat(path)
+    except OSError:
+        raise Http404("Media not found")
+    if not stat.S_ISREG(info.st_mode):
+        raise Http404("Media not found")
+    etag = etag or f'"{info.st_mtime_ns:x}-{info.st_size:x}"'
+    last_modified = int(info.st_mtime)
+
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        content_type = content_type or mimetypes.guess_type(name)[0] or "application/octet-stream"
+        response = _sendfile_response(name, path, content_type)
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(last_modified)
+    response["Cache-Control"] = cache_control()
+    return response
@@ -1,14 +1,22 @@
+import re
+
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, include, re_path
 from django.conf import settings
-from django.conf.urls.static import static
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
-from .views import google_login
+from . import async_views
+from .views import google_login, media
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/auth/token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
     path('api/auth/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
-    path('api/auth/google/', google_login, name='google_login'),
+    path('api/auth/google/', async_views.google_login if settings.ASYNC_VIEWS else google_login, name='google_login'),
     path('api/', include('events.urls')),
-] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+]
+
+# Bucket-backed media has an absolute MEDIA_URL and never comes through here.
+if settings.MEDIA_URL.startswith('/'):
+    urlpatterns.append(
+        re_path(r'^%s(?P<path>.+)$' % re.escape(settings.MEDIA_URL.lstrip('/')), media, name='media')
+    )
@@ -1,12 +1,14 @@
 from django.conf import settings
 from django.contrib.auth.models import User
+from django.utils import timezone
+from django.views.decorators.http import require_safe
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework_simplejwt.tokens import RefreshToken
-from google.oauth2 import id_token
-from google.auth.transport import requests as google_requests
+from .google_tokens import verify_id_token
+from .media import media_response
 
 
 @api_view(["POST"])
@@ -17,11 +19,7 @@ def google_login(request):
         return Response({"error": "Missing credential"}, status=status.HTTP_400_BAD_REQUEST)
 
     try:
-        payload = id_token.verify_oauth2_token(
-            credential,
-            google_requests.Request(),
-            settings.GOOGLE_CLIENT_ID or None,
-        )
+        payload = verify_id_token(credential, settings.GOOGLE_CLIENT_ID or None)
     except Exception:
         return Response({"error": "Invalid Google token"}, status=status.HTTP_400_BAD_REQUEST)
 
@@ -37,9 +35,10 @@ def google_login(request):
             "last_name": payload.get("family_name", ""),
         },
     )
+    user.last_login = timezone.now()
     if created:
         user.set_unusable_password()
-        user.save(update_fields=["password"])
+    user.save(update_fields=["last_login", "password"] if created else ["last_login"])
 
     refresh = RefreshToken.for_user(user)
     return Response(
@@ -50,3 +49,9 @@ def google_login(request):
         },
         status=status.HTTP_200_OK,
     )
+
+
+@require_safe
+def media(request, path):
+    """Uploaded media at MEDIA_URL, when it is served by this app (see core/media.py)."""
+    return media_response(request, path)
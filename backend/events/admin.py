@@ -1,8 +1,10 @@
 from django.contrib import admin
-from .models import Event, TicketType, Attendee, Ticket, CheckIn
+from .models import Event, TicketType, Attendee, Ticket, CheckIn, Notification, WebhookEvent
 
 admin.site.register(Event)
 admin.site.register(TicketType)
 admin.site.register(Attendee)
 admin.site.register(Ticket)
 admin.site.register(CheckIn)
+admin.site.register(Notification)
+admin.site.register(WebhookEvent)
@@ -0,0 +1,259 @@
+"""Async versions of the purchase endpoints, served under ASGI.
+
+A purchase spends most of its time waiting on Paystack. These views await
+it on the event loop instead of holding a worker thread for the whole
+call. Queries go through the async ORM. The transactional helpers shared
+with the DRF actions run through ``sync_to_async``, because the async ORM
+cannot open transactions.
+
+When ``settings.ASYNC_VIEWS`` is set (``core/asgi.py`` sets it), these
+views serve the same URLs as ``TicketViewSet.initialize_payment`` and
+``verify_payment``, with the same request and response bodies.
+
+``event_live`` is the Server-Sent Events stream of an event's sales and
+check-ins (events/live.py). It only exists under ASGI: an open stream
+costs a queue on the event loop, where under WSGI it would hold a worker.
+"""
+import asyncio
+import json
+import uuid
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.conf import settings
+from django.core.signing import BadSignature
+from django.http import HttpResponseNotAllowed, JsonResponse, StreamingHttpResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET, require_POST
+from rest_framework.exceptions import AuthenticationFailed, Throttled
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from .attendees import holder_details, resolve_attendee
+from .live import RESYNC, broker, stream_token_user
+from .models import Attendee, Event, Ticket, TicketType
+from .paystack import ainitialize_transaction, averify_transaction
+from .reservations import release_seats, reserve_seats
+from .sales import event_stats
+from .serializers import TicketPurchaseSerializer, TicketSerializer
+from .throttling import client_ident, purchase_wait, verify_wait
+from .waiting_room import EventNotFound, WaitingRoomUnavailable, acheck_admission, ajoin, astatus
+from .views import _finalize_ticket_payment
+
+
+def request_data(request):
+    """The parsed JSON, form or multipart body, or None if the JSON is invalid."""
+    if request.content_type == "application/json":
+        try:
+            return json.loads(request.body or b"{}")
+        except ValueError:
+            return None
+    data = request.POST.dict()
+    data.update(request.FILES.dict())
+    return data
+
+
+def throttled(wait):
+    """The 429 DRF sends for a throttled request."""
+    exc = Throttled(wait)
+    response = JsonResponse({"detail": str(exc.detail)}, status=exc.status_code)
+    response["Retry-After"] = str(exc.wait)
+    return response
+
+
+async def _tickets_data(payment_ref):
+    tickets = [
+        ticket
+        async for ticket in Ticket.objects.filter(payment_ref=payment_ref).select_related("attendee", "ticket_type")
+    ]
+    return TicketSerializer(tickets, many=True).data
+
+
+@csrf_exempt
+@require_POST
+async def initialize_payment(request):
+    # Through sync_to_async: the buckets may be in Redis, Memcached or the database.
+    wait = await sync_to_async(purchase_wait)(client_ident(request), lambda: request_data(request))
+    if wait is not None:
+        return throttled(wait)
+    data = request_data(request)
+    if data is None:
+        return JsonResponse({"error": "Invalid JSON"}, status=400)
+    refused = await acheck_admission(data.get("event"), request.headers.get("X-Admission-Token"))
+    if refused:
+        return JsonResponse({"error": refused}, status=403)
+    serializer = TicketPurchaseSerializer(data=data)
+    if not serializer.is_valid():
+        return JsonResponse(serializer.errors, status=400)
+    data = serializer.validated_data
+
+    try:
+        event = await Event.objects.aget(id=data["event"])
+    except Event.DoesNotExist:
+        return JsonResponse({"error": "Event not found"}, status=404)
+
+    try:
+        ticket_type = await TicketType.objects.aget(id=data["ticket_type"], event=event)
+    except TicketType.DoesNotExist:
+        return JsonResponse({"error": "Ticket type not found"}, status=404)
+
+    payment_ref = f"PSK-{uuid.uuid4().hex[:12].upper()}"
+    quantity = data.get("quantity", 1)
+    if not await sync_to_async(reserve_seats)(ticket_type.id, quantity, payment_ref):
+        return JsonResponse({"error": "Not enough tickets available"}, status=400)
+
+    user, created = await User.objects.aget_or_create(
+        email=data["email"],
+        defaults={
+            "username": data["email"],
+            "first_name": data["full_name"].split(" ")[0],
+            "last_name": " ".join(data["full_name"].split(" ")[1:]),
+        }
+    )
+
+    buyer = await sync_to_async(_jwt_user)(request)
+    attendee, _ = await sync_to_async(resolve_attendee)(user, data, signed_in=buyer is not None and buyer.pk == user.pk)
+
+    await Ticket.objects.abulk_create([
+        Ticket(
+            event=event,
+            ticket_type=ticket_type,
+            attendee=attendee,
+            status="pending",
+            payment_ref=payment_ref,
+            **holder_details(data),
+        )
+        for _ in range(quantity)
+    ])
+
+    if float(ticket_type.price) <= 0:
+        await sync_to_async(_finalize_ticket_payment)(payment_ref, notify=True)
+        return JsonResponse({"status": "paid", "tickets": await _tickets_data(payment_ref)})
+
+    paystack = await ainitialize_transaction(
+        email=data["email"],
+        amount=float(ticket_type.price) * quantity,
+        reference=payment_ref,
+    )
+    if not paystack["ok"]:
+        await Ticket.objects.filter(payment_ref=payment_ref).adelete()
+        await Attendee.objects.filter(id=attendee.id, tickets__isnull=True).adelete()
+        await sync_to_async(release_seats)(payment_ref)
+        return JsonResponse({"error": "Payment initialization failed"}, status=502)
+
+    return JsonResponse({
+        "status": "pending",
+        "authorization_url": paystack["authorization_url"],
+        "reference": payment_ref,
+    })
+
+
+@csrf_exempt
+@require_POST
+async def verify_payment(request):
+    wait = await sync_to_async(verify_wait)(client_ident(request))
+    if wait is not None:
+        return throttled(wait)
+    data = request_data(request)
+    reference = data.get("reference") if data else None
+    if not reference:
+        return JsonResponse({"error": "reference is required"}, status=400)
+
+    verified = await averify_transaction(reference)
+    if verified.get("unavailable"):
+        return JsonResponse({"error": "Payment provider unavailable, try again shortly"}, status=503)
+    if not verified["ok"]:
+        return JsonResponse({"error": "Payment verification failed"}, status=400)
+
+    if not await Ticket.objects.filter(payment_ref=reference).aexists():
+        return JsonResponse({"error": "Ticket not found"}, status=404)
+
+    await sync_to_async(_finalize_ticket_payment)(reference, notify=True)
+    return JsonResponse({"status": "paid", "tickets": await _tickets_data(reference)})
+
+
+@csrf_exempt
+async def waiting_room(request, event_id):
+    """Async twin of ``views.waiting_room``: POST joins, GET ?token= checks your turn."""
+    if request.method not in ("GET", "POST"):
+        return HttpResponseNotAllowed(["GET", "POST"])
+    try:
+        if request.method == "POST":
+            return JsonResponse(await ajoin(event_id))
+        token = request.GET.get("token")
+        if not token:
+            return JsonResponse({"error": "token is required"}, status=400)
+        return JsonResponse(await astatus(event_id, token))
+    except EventNotFound:
+        return JsonResponse({"error": "Event not found"}, status=404)
+    except BadSignature:
+        return JsonResponse({"error": "Queue token is invalid or has expired"}, status=400)
+    except WaitingRoomUnavailable:
+        return JsonResponse({"error": "Waiting room unavailable, try again shortly"}, status=503)
+
+
+def _jwt_user(request):
+    """The user of the request's bearer token, or None without a valid one."""
+    try:
+        authenticated = JWTAuthentication().authenticate(request)
+    except AuthenticationFailed:
+        return None
+    return authenticated[0] if authenticated else None
+
+
+def _stream_user(request, event_id):
+    token = request.GET.get("token")
+    if token:
+        return stream_token_user(token, event_id)
+    return _jwt_user(request)
+
+
+def _sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+
+async def _live_messages(event, subscription):
+    try:
+        yield f"retry: {settings.LIVE_RETRY_MILLISECONDS}\n\n"
+        yield _sse("snapshot", await sync_to_async(event_stats)(event))
+        while True:
+            try:
+                message = await asyncio.wait_for(subscription.get(), settings.LIVE_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                # A comment line keeps proxies from closing an idle stream.
+                yield ": keepalive\n\n"
+                continue
+            if message is RESYNC:
+                yield _sse("snapshot", await sync_to_async(event_stats)(event))
+            else:
+                yield _sse(message["type"], message)
+    finally:
+        broker.unsubscribe(subscription)
+
+
+@require_GET
+async def event_live(request, event_id):
+    """Stream ``event_id``'s sales and check-ins to a staff user.
+
+    Sends a ``snapshot`` (the stats endpoint's body) first and again after
+    falling behind, then ``sale``, ``cancelled`` and ``check_in`` events as
+    they commit. Authenticate with a JWT or a ``?token=`` from
+    ``POST /api/events/<id>/live-token/``. A reconnecting client starts
+    over from a new snapshot, so Last-Event-ID is not needed.
+    """
+    user = await sync_to_async(_stream_user)(request, event_id)
+    if user is None:
+        return JsonResponse({"detail": "Authentication credentials were not provided."}, status=401)
+    if not user.is_staff:
+        return JsonResponse({"detail": "You do not have permission to perform this action."}, status=403)
+    event = await Event.objects.filter(id=event_id).afirst()
+    if event is None:
+        return JsonResponse({"detail": "No Event matches the given query."}, status=404)
+
+    # Subscribe before the snapshot is read, so nothing committed in
+    # between is missed.
+    subscription = broker.subscribe(str(event.id))
+    response = StreamingHttpResponse(_live_messages(event, subscription), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    # nginx buffers proxied responses unless told not to.
+    response["X-Accel-Buffering"] = "no"
+    return response
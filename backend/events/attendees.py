@@ -0,0 +1,89 @@
+"""One Attendee per buyer.
+
+A purchase is linked to the buyer's user, and ``Attendee.user`` is
+one-to-one, so ``resolve_attendee`` gets the buyer's existing attendee.
+Anyone can type an email address at checkout, so only a purchase made
+signed in as that user changes an existing attendee's details (and then
+only the ones that changed). The details typed for each order are kept on
+its tickets by ``holder_details`` either way.
+
+Pictures are stored under a name taken from their content,
+``attendees/<sha256>.<ext>``. Uploading the same picture again costs no
+write, and it picks up the variants already rendered for that file.
+Several attendees can share one file, so files are deleted only by
+``release_pictures`` once no attendee refers to them.
+"""
+import hashlib
+import os
+
+from django.core.files.storage import default_storage
+from django.db import transaction
+
+from .images import known_variants, stored_paths
+from .models import Attendee
+
+DETAIL_FIELDS = ["full_name", "email", "age", "phone"]
+
+
+def picture_name(upload):
+    digest = hashlib.sha256()
+    for chunk in upload.chunks():
+        digest.update(chunk)
+    upload.seek(0)
+    extension = os.path.splitext(upload.name or "")[1].lower() or ".jpg"
+    return f"attendees/{digest.hexdigest()}{extension}"
+
+
+def store_picture(upload):
+    """Store ``upload`` unless identical content is stored already; returns its name."""
+    name = picture_name(upload)
+    if default_storage.exists(name):
+        return name
+    return default_storage.save(name, upload)
+
+
+def resolve_attendee(user, data, signed_in=False):
+    """``user``'s attendee, created from ``data`` if they have none; returns ``(attendee, created)``.
+
+    An existing attendee takes the details in ``data`` only if ``signed_in``,
+    i.e. the purchase was made by ``user`` themselves.
+    """
+    attendee, created = Attendee.objects.get_or_create(
+        user=user, defaults={field: data[field] for field in DETAIL_FIELDS},
+    )
+    if not (created or signed_in):
+        return attendee, False
+
+    details = {} if created else {field: data[field] for field in DETAIL_FIELDS}
+    previous = None
+    if data.get("picture"):
+        name = store_picture(data["picture"])
+        if name != attendee.picture.name:
+            if attendee.picture:
+                previous = (attendee.picture.name, attendee.picture_variants)
+            details["picture"], details["picture_variants"] = name, known_variants(Attendee, "picture", name)
+    changed = [field for field, value in details.items() if getattr(attendee, field) != value]
+    if changed:
+        for field in changed:
+            setattr(attendee, field, details[field])
+        attendee.save(update_fields=changed)
+    if previous:
+        transaction.on_commit(lambda: release_pictures([previous]))
+    return attendee, created
+
+
+def holder_details(data):
+    """Ticket fields recording the details typed for one order."""
+    return {"holder_name": data["full_name"], "holder_age": data["age"], "holder_phone": data["phone"]}
+
+
+def release_pictures(pictures):
+    """Delete the stored files of ``pictures`` (name, variants) that no attendee uses any more."""
+    names = {name for name, _ in pictures if name and not name.startswith(("http://", "https://"))}
+    if not names:
+        return
+    used = set(Attendee.objects.filter(picture__in=names).values_list("picture", flat=True))
+    for name, variants in pictures:
+        if name in names and name not in used:
+            for path in [name, *stored_paths(variants)]:
+                default_storage.delete(path)
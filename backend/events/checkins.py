@@ -0,0 +1,93 @@
+import uuid
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .live import publish_check_ins
+from .models import CheckIn, Ticket
+from .sales import record_check_ins
+
+
+def _as_uuid(key):
+    try:
+        return uuid.UUID(str(key))
+    except ValueError:
+        return None
+
+
+def _split_keys(keys):
+    ids, codes = set(), set()
+    for key in keys:
+        ticket_id = _as_uuid(key)
+        if ticket_id is None:
+            codes.add(key)
+        else:
+            ids.add(ticket_id)
+    return ids, codes
+
+
+def check_in_tickets(items, event_id=None):
+    """Check in many tickets with one conditional UPDATE and one INSERT.
+
+    ``items`` are dicts with ``ticket`` (a ticket id or code),
+    ``checked_in_by`` and optionally ``checked_in_at``. Returns one
+    ``(result, ticket, check_in)`` tuple per item, in order. ``ticket`` is a
+    dict with ``id``, ``code`` and ``status`` (None if not found).
+    ``result`` is one of:
+
+    - ``checked_in``
+    - ``already_checked_in``, with ``check_in`` set if an earlier item in
+      this batch did it
+    - ``not_paid``
+    - ``cancelled``
+    - ``not_found``
+
+    The ticket rows are locked for the whole batch, so two gates sending
+    the same ticket at once cannot both check it in.
+    """
+    ids, codes = _split_keys(item["ticket"] for item in items)
+    now = timezone.now()
+    results = []
+    with transaction.atomic():
+        queryset = Ticket.objects.select_for_update().filter(Q(id__in=ids) | Q(code__in=codes))
+        if event_id is not None:
+            queryset = queryset.filter(event_id=event_id)
+        rows = list(queryset.values("id", "code", "status", "ticket_type_id", "event_id"))
+        by_key = {}
+        for row in rows:
+            by_key[row["id"]] = row
+            if row["code"]:
+                by_key[row["code"]] = row
+
+        new_check_ins = {}
+        for item in items:
+            key = item["ticket"]
+            row = by_key.get(_as_uuid(key) or key)
+            if row is None:
+                results.append(("not_found", None, None))
+            elif row["id"] in new_check_ins:
+                results.append(("already_checked_in", row, new_check_ins[row["id"]]))
+            elif row["status"] == "paid":
+                check_in = CheckIn(
+                    ticket_id=row["id"],
+                    checked_in_by=item["checked_in_by"],
+                    checked_in_at=item.get("checked_in_at") or now,
+                )
+                new_check_ins[row["id"]] = check_in
+                results.append(("checked_in", row, check_in))
+            elif row["status"] == "checked_in":
+                results.append(("already_checked_in", row, None))
+            elif row["status"] == "cancelled":
+                results.append(("cancelled", row, None))
+            else:
+                results.append(("not_paid", row, None))
+
+        if new_check_ins:
+            Ticket.objects.filter(id__in=list(new_check_ins), status="paid").update(
+                status="checked_in", updated_at=now
+            )
+            CheckIn.objects.bulk_create(new_check_ins.values())
+            record_check_ins(by_key[ticket_id] for ticket_id in new_check_ins)
+            publish_check_ins(by_key[ticket_id] for ticket_id in new_check_ins)
+    return results
@@ -0,0 +1,44 @@
+"""Parsing of event dates.
+
+``Event.date_time`` is free text shown as entered, e.g.
+"Sat, Feb 14, 2026 · 5:30 PM" from the admin form or "2026-02-26" from
+older clients. ``parse_event_datetime`` turns the forms we have seen into
+an aware datetime for ``Event.starts_at``; naive values are taken to be in
+TIME_ZONE and a bare date means midnight.
+"""
+import re
+from datetime import datetime, timezone as dt_timezone
+
+from django.utils import timezone
+
+_WEEKDAY = re.compile(r"^[A-Za-z]{3,9},?\s+(?=[A-Za-z]{3})")
+_SEPARATORS = re.compile(r"\s*(?:·|•|\||@|\bat\b)\s*|\s+")
+
+_DATE_FORMATS = ["%b %d, %Y", "%B %d, %Y", "%b %d %Y", "%B %d %Y", "%d %b %Y", "%d %B %Y"]
+_TIME_FORMATS = ["%I:%M %p", "%I %p", "%I:%M%p", "%I%p", "%H:%M"]
+_FORMATS = [f"{d} {t}" for d in _DATE_FORMATS for t in _TIME_FORMATS] + _DATE_FORMATS
+
+# Where events with no parsed date sort: after every real date.
+UNDATED = datetime(9999, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def _aware(value):
+    return timezone.make_aware(value) if timezone.is_naive(value) else value
+
+
+def parse_event_datetime(value):
+    """Return the aware datetime ``value`` describes, or None if it is not a date."""
+    value = (value or "").strip()
+    if not value:
+        return None
+    try:
+        return _aware(datetime.fromisoformat(value))
+    except ValueError:
+        pass
+    text = _SEPARATORS.sub(" ", _WEEKDAY.sub("", value)).strip()
+    for fmt in _FORMATS:
+        try:
+            return _aware(datetime.strptime(text, fmt))
+        except ValueError:
+            pass
+    return None
@@ -0,0 +1,196 @@
+"""Resized, metadata-free copies of uploaded images.
+
+Event flyers and attendee pictures are stored exactly as uploaded, which
+can mean multi-megabyte phone photos with EXIF (including GPS) attached.
+``manage.py process_images`` later re-encodes each one at the widths in
+IMAGE_VARIANT_WIDTHS, as WebP and as JPEG, with no EXIF, XMP or ICC data,
+and records them in the row's ``<field>_variants``. Serializers expose
+them as ``srcset`` strings, so a client downloads the size it displays
+instead of the original. The work happens outside the request, so an
+upload costs nothing extra.
+
+A row needs (re)processing when its variants were made from a different
+file than the one now in the field; that covers new uploads and replaced
+ones without any bookkeeping in the views.
+
+Attendee pictures are stored by content (events/attendees.py), so several
+rows can hold one file and share one variant map. A row whose file another
+row has already processed copies that map instead of rendering it again,
+and a replaced map's files are deleted only once no row refers to them.
+"""
+import io
+import logging
+import os
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db.models import F, Q
+from django.db.models.fields.json import KT
+from PIL import Image, ImageCms, ImageOps
+
+from .models import Attendee, Event
+
+logger = logging.getLogger(__name__)
+
+VARIANT_FORMATS = {"webp": "image/webp", "jpeg": "image/jpeg"}
+
+IMAGE_FIELDS = [(Event, "flyer"), (Attendee, "picture")]
+
+_SRGB = ImageCms.ImageCmsProfile(ImageCms.createProfile("sRGB"))
+
+
+def _to_srgb(image):
+    """Convert to RGB(A) in sRGB, since the ICC profile is not kept."""
+    mode = "RGBA" if image.mode in ("RGBA", "LA", "PA") or "transparency" in image.info else "RGB"
+    icc = image.info.get("icc_profile")
+    image = image.convert(mode)
+    if icc:
+        try:
+            source = ImageCms.ImageCmsProfile(io.BytesIO(icc))
+            image = ImageCms.profileToProfile(image, source, _SRGB, outputMode=mode)
+        except ImageCms.PyCMSError:
+            pass
+    return image
+
+
+def render_variants(data, widths, quality):
+    """Decode image bytes and re-encode them at each of ``widths``.
+
+    Returns ``(width, height, variants)`` where width and height are the
+    full size of the upright original and variants is a list of
+    ``(width, fmt, bytes)``. Widths larger than the original are skipped;
+    an image narrower than every width gets one variant at its own size.
+    """
+    image = Image.open(io.BytesIO(data))
+    # Let the JPEG decoder downscale by a power of two while decoding,
+    # never below the largest width we need in either orientation.
+    original = image.size
+    largest = max(widths)
+    image.draft("RGB", (largest, largest))
+    drafted = image.size
+    image = _to_srgb(ImageOps.exif_transpose(image))
+    if image.size != drafted:
+        original = original[::-1]
+    width, height = image.size
+
+    targets = sorted({w for w in widths if w < width} | {min(largest, width)})
+    variants = []
+    for target in targets:
+        resized = image if target == width else image.resize(
+            (target, max(1, round(height * target / width))), Image.Resampling.LANCZOS
+        )
+        # Nothing from the upload's info dict is passed to save(), so no
+        # EXIF, XMP or ICC data is written.
+        resized.info = {}
+        webp = io.BytesIO()
+        resized.save(webp, format="WEBP", quality=quality, method=4)
+        variants.append((target, "webp", webp.getvalue()))
+        if resized.mode == "RGBA":
+            flat = Image.new("RGB", resized.size, (255, 255, 255))
+            flat.paste(resized, mask=resized.getchannel("A"))
+            resized = flat
+        jpeg = io.BytesIO()
+        resized.save(jpeg, format="JPEG", quality=quality, optimize=True, progressive=True)
+        variants.append((target, "jpeg", jpeg.getvalue()))
+    return original[0], original[1], variants
+
+
+def variant_path(name, width, fmt):
+    directory, filename = os.path.split(name)
+    stem = os.path.splitext(filename)[0]
+    return f"{directory}/variants/{stem}-{width}w.{'jpg' if fmt == 'jpeg' else fmt}"
+
+
+def stored_paths(variants):
+    """The storage paths of every file in a ``*_variants`` map."""
+    if not variants:
+        return []
+    return [path for fmt in VARIANT_FORMATS for path in (variants.get(fmt) or {}).values()]
+
+
+def known_variants(model, field, name, exclude_pk=None):
+    """The variant map another ``model`` row holding the file ``name`` already has, or None."""
+    return (
+        model.objects.filter(**{field: name, f"{field}_variants__source": name})
+        .exclude(pk=exclude_pk)
+        .values_list(f"{field}_variants", flat=True)
+        .first()
+    )
+
+
+def _release_variants(instance, field, previous):
+    """Delete the files of ``previous``, the map ``instance`` just replaced, unless another row shares it."""
+    current = set(stored_paths(getattr(instance, f"{field}_variants")))
+    paths = [path for path in stored_paths(previous) if path not in current]
+    if not paths:
+        return
+    if type(instance).objects.filter(**{f"{field}_variants__source": previous["source"]}).exclude(pk=instance.pk).exists():
+        return
+    for path in paths:
+        default_storage.delete(path)
+
+
+def process_image(instance, field):
+    """Render and store the variants for ``instance.<field>``.
+
+    Saves the new map on the row (which fires the usual post_save cache
+    invalidation) and deletes the variants of the file it replaced. An
+    unreadable upload is recorded as an error so it is not retried.
+    """
+    image = getattr(instance, field)
+    previous = getattr(instance, f"{field}_variants")
+    variants = known_variants(type(instance), field, image.name, exclude_pk=instance.pk)
+    if variants is not None:
+        setattr(instance, f"{field}_variants", variants)
+        instance.save(update_fields=[f"{field}_variants"])
+        _release_variants(instance, field, previous)
+        return variants
+    try:
+        with default_storage.open(image.name) as source:
+            data = source.read()
+        width, height, rendered = render_variants(
+            data, settings.IMAGE_VARIANT_WIDTHS, settings.IMAGE_VARIANT_QUALITY
+        )
+    except Exception as e:
+        logger.warning("Could not process %s %s image %s: %s", instance._meta.model_name, instance.pk, image.name, e)
+        variants = {"source": image.name, "error": str(e)}
+    else:
+        variants = {"source": image.name, "width": width, "height": height}
+        for target, fmt, content in rendered:
+            path = default_storage.save(variant_path(image.name, target, fmt), ContentFile(content))
+            variants.setdefault(fmt, {})[str(target)] = path
+
+    setattr(instance, f"{field}_variants", variants)
+    instance.save(update_fields=[f"{field}_variants"])
+    _release_variants(instance, field, previous)
+    return variants
+
+
+def pending_images(model, field):
+    """Rows whose ``field`` has no variants for the file it holds now."""
+    return (
+        model.objects.exclude(**{f"{field}__isnull": True})
+        .exclude(**{field: ""})
+        .exclude(**{f"{field}__regex": r"^https?://"})
+        .annotate(variants_source=KT(f"{field}_variants__source"))
+        .filter(Q(variants_source__isnull=True) | ~Q(variants_source=F(field)))
+        .order_by("pk")
+    )
+
+
+def process_pending_images(batch_size=None):
+    """Process up to ``batch_size`` pending images of each kind; returns how many."""
+    batch_size = batch_size or settings.IMAGE_BATCH_SIZE
+    processed = 0
+    for model, field in IMAGE_FIELDS:
+        for instance in pending_images(model, field)[:batch_size]:
+            process_image(instance, field)
+            processed += 1
+    return processed
+
+
+def srcset(variants, fmt, url):
+    """``srcset`` attribute value for one format, with ``url(path)`` for each variant."""
+    paths = (variants or {}).get(fmt) or {}
+    return ", ".join(f"{url(path)} {width}w" for width, path in sorted(paths.items(), key=lambda item: int(item[0])))
@@ -0,0 +1,260 @@
+"""Live check-in and sales feed for the per-event stream.
+
+Views publish small messages ("sale", "cancelled", "check_in") for an
+event once their transaction commits, each with the current figures of
+the ticket type it concerns. ``broker`` hands each one to every
+stream open on that event in this process; the LIVE_BACKEND class carries
+messages between processes:
+
+- ``LocalBackend`` delivers inside the publishing process only. That is
+  enough for a single web worker and for tests, but payments settled by
+  ``manage.py process_webhooks`` or by another worker are not seen. With
+  no stream open it does no work at all.
+- ``PostgresBackend`` sends each message with ``pg_notify`` on the main
+  database; every web worker runs one thread that LISTENs and feeds its
+  local broker. It needs a direct (session) connection: LISTEN does not
+  work through a transaction pooler such as PgBouncer.
+
+A slow stream never holds up publishers: its queue holds at most
+LIVE_QUEUE_SIZE messages, and when it overflows the backlog is replaced
+by a fresh snapshot from the summary tables.
+"""
+import asyncio
+import json
+import logging
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core import signing
+from django.db import connection, connections, transaction
+from django.utils.module_loading import import_string
+
+from .models import TicketType
+from .sales import ticket_type_figures
+
+logger = logging.getLogger(__name__)
+
+# Put on a subscription's queue in place of the messages it dropped.
+RESYNC = {"type": "resync"}
+
+_TOKEN_SALT = "events.live"
+
+# pg_notify payloads must stay under 8000 bytes.
+CODES_PER_MESSAGE = 200
+
+
+class Subscription:
+    def __init__(self, channel, loop, maxsize):
+        self.channel = channel
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=maxsize)
+        self.overflowed = False
+
+    def _put(self, message):
+        # Runs on the subscriber's loop.
+        if self.overflowed:
+            return
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            # Drop the backlog; the stream sends a fresh snapshot instead.
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(RESYNC)
+            self.overflowed = True
+
+    async def get(self):
+        message = await self.queue.get()
+        if message is RESYNC:
+            self.overflowed = False
+        return message
+
+
+class Broker:
+    """Fans messages out to the streams open in this process."""
+
+    def __init__(self):
+        self._subscriptions = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def subscribe(self, channel):
+        """Start receiving ``channel``'s messages; call from the stream's event loop."""
+        backend().start()
+        subscription = Subscription(channel, asyncio.get_running_loop(), settings.LIVE_QUEUE_SIZE)
+        with self._lock:
+            self._subscriptions[channel].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.channel)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscriptions[subscription.channel]
+
+    def subscriber_count(self, channel):
+        with self._lock:
+            return len(self._subscriptions.get(channel, ()))
+
+    def deliver(self, channel, message):
+        """Queue ``message`` for each subscriber; safe to call from any thread."""
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(channel, ()))
+        for subscription in subscriptions:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription._put, message)
+            except RuntimeError:
+                # The stream's loop has closed; it unsubscribes on its way out.
+                pass
+
+
+broker = Broker()
+
+
+class LocalBackend:
+    """Delivers to streams in the publishing process only."""
+
+    def __init__(self, broker):
+        self.broker = broker
+
+    def send(self, channel, build):
+        if self.broker.subscriber_count(channel):
+            self.broker.deliver(channel, build())
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+
+class PostgresBackend:
+    """Carries messages between processes with LISTEN/NOTIFY."""
+
+    channel = "entree_live"
+
+    def __init__(self, broker):
+        self.broker = broker
+        self._thread = None
+        self._stopping = threading.Event()
+        self._lock = threading.Lock()
+        self.listening = threading.Event()
+
+    def send(self, channel, build):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT pg_notify(%s, %s)",
+                [self.channel, json.dumps({"channel": channel, "message": build()})],
+            )
+
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stopping.clear()
+                self._thread = threading.Thread(target=self._listen_forever, name="live-listener", daemon=True)
+                self._thread.start()
+
+    def stop(self):
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _listen_forever(self):
+        delay = 1
+        while not self._stopping.is_set():
+            try:
+                self._listen()
+                delay = 1
+            except Exception as e:
+                self.listening.clear()
+                logger.warning("Live listener lost its connection: %s", e)
+                self._stopping.wait(delay)
+                delay = min(delay * 2, 30)
+
+    def _listen(self):
+        wrapper = connections.create_connection("default")
+        try:
+            wrapper.connect()
+            raw = wrapper.connection
+            raw.autocommit = True
+            raw.execute(f"LISTEN {self.channel}")
+            self.listening.set()
+            while not self._stopping.is_set():
+                for notify in raw.notifies(timeout=1):
+                    payload = json.loads(notify.payload)
+                    self.broker.deliver(payload["channel"], payload["message"])
+        finally:
+            self.listening.clear()
+            wrapper.close()
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def backend():
+    global _backend
+    with _backend_lock:
+        if _backend is None or type(_backend) is not import_string(settings.LIVE_BACKEND):
+            if _backend is not None:
+                _backend.stop()
+            _backend = import_string(settings.LIVE_BACKEND)(broker)
+        return _backend
+
+
+def _ticket_type_message(message, ticket_type_id):
+    ticket_type = TicketType.objects.select_related("sales").get(id=ticket_type_id)
+    return {**message, "ticket_type": ticket_type_figures(ticket_type)}
+
+
+def _send(channel, build):
+    try:
+        backend().send(channel, build)
+    except Exception as e:
+        # The feed is best effort; a stream can always resync from the stats.
+        logger.warning("Could not publish to event %s: %s", channel, e)
+
+
+def publish(event_id, ticket_type_id, message):
+    """Publish ``message`` to ``event_id``'s streams once the current transaction commits.
+
+    The ticket type's figures, read after the commit, go with it under
+    ``ticket_type``: clients replace what they have rather than add
+    deltas, so a message that overlaps a snapshot is not counted twice.
+    """
+    transaction.on_commit(lambda: _send(str(event_id), lambda: _ticket_type_message(message, ticket_type_id)))
+
+
+def publish_check_ins(tickets):
+    """Publish check-ins of ``tickets``: dicts with event_id, ticket_type_id and code."""
+    grouped = defaultdict(list)
+    for ticket in tickets:
+        grouped[(ticket["event_id"], ticket["ticket_type_id"])].append(ticket["code"])
+    for (event_id, ticket_type_id), codes in grouped.items():
+        for start in range(0, len(codes), CODES_PER_MESSAGE):
+            publish(event_id, ticket_type_id, {"type": "check_in", "codes": codes[start:start + CODES_PER_MESSAGE]})
+
+
+def stream_token(user, event_id):
+    """A short-lived token that lets ``user`` open ``event_id``'s stream.
+
+    EventSource cannot send an Authorization header, so browsers pass this
+    as ``?token=`` instead of their JWT; it expires after
+    LIVE_TOKEN_MAX_AGE seconds and only opens the one event's stream.
+    """
+    return signing.dumps({"user": user.pk, "event": str(event_id)}, salt=_TOKEN_SALT)
+
+
+def stream_token_user(token, event_id):
+    """The staff user ``token`` was issued to for ``event_id``, or None."""
+    try:
+        data = signing.loads(token, salt=_TOKEN_SALT, max_age=settings.LIVE_TOKEN_MAX_AGE)
+    except signing.BadSignature:
+        return None
+    if data.get("event") != str(event_id):
+        return None
+    return User.objects.filter(pk=data.get("user"), is_active=True, is_staff=True).first()
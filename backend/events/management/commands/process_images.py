@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from events.images import process_pending_images
+
+
+class Command(BaseCommand):
+    help = "Render resized WebP/JPEG variants of uploaded flyers and attendee pictures."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=None)
+        parser.add_argument("--loop", action="store_true", help="Keep polling for new uploads instead of exiting once none are pending.")
+        parser.add_argument("--interval", type=float, default=5.0, help="Seconds to sleep when nothing is pending (with --loop).")
+
+    def handle(self, *args, **options):
+        total = 0
+        while True:
+            processed = process_pending_images(batch_size=options["batch_size"])
+            total += processed
+            if processed:
+                self.stdout.write(f"Processed {processed} images")
+                continue
+            if not options["loop"]:
+                break
+            time.sleep(options["interval"])
+        self.stdout.write(self.style.SUCCESS(f"Images up to date: {total} processed"))
@@ -0,0 +1,30 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from events.webhooks import process_inbox
+
+
+class Command(BaseCommand):
+    help = "Process Paystack webhook deliveries stored in the inbox."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=None)
+        parser.add_argument("--loop", action="store_true", help="Keep polling the inbox instead of exiting once it is empty.")
+        parser.add_argument("--interval", type=float, default=1.0, help="Seconds to sleep when the inbox is empty (with --loop).")
+
+    def handle(self, *args, **options):
+        totals = {"processed": 0, "skipped": 0, "failed": 0}
+        while True:
+            result = process_inbox(batch_size=options["batch_size"])
+            for key in totals:
+                totals[key] += result[key]
+            if any(result.values()):
+                self.stdout.write(f"Processed {result['processed']}, skipped {result['skipped']}, failed {result['failed']}")
+                continue
+            if not options["loop"]:
+                break
+            time.sleep(options["interval"])
+        self.stdout.write(self.style.SUCCESS(
+            f"Inbox drained: {totals['processed']} processed, {totals['skipped']} skipped, {totals['failed']} failed"
+        ))
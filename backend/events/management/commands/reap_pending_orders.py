@@ -0,0 +1,38 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from events.reaper import reap_pending_orders
+
+
+def _summary(deleted):
+    return ", ".join(f"{label}={count}" for label, count in sorted(deleted.items())) or "nothing"
+
+
+class Command(BaseCommand):
+    help = "Delete orders left pending past PENDING_ORDER_TTL_SECONDS, with their attendees and throwaway users."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500, help="Tickets per batch (and transaction).")
+        parser.add_argument("--ttl", type=int, help="Seconds an order may stay pending (default PENDING_ORDER_TTL_SECONDS).")
+        parser.add_argument("--archive", help="Append the reaped orders as JSON lines to this gzip file.")
+        parser.add_argument("--loop", action="store_true", help="Keep reaping instead of exiting once nothing is left.")
+        parser.add_argument("--interval", type=float, default=3600.0, help="Seconds to sleep between runs (with --loop).")
+
+    def handle(self, *args, **options):
+        total = {}
+        started = time.monotonic()
+        while True:
+            batch_started = time.monotonic()
+            deleted = reap_pending_orders(options["batch_size"], options["ttl"], options["archive"])
+            if deleted:
+                for label, count in deleted.items():
+                    total[label] = total.get(label, 0) + count
+                self.stdout.write(f"Deleted {_summary(deleted)} in {time.monotonic() - batch_started:.2f}s")
+                continue
+            if not options["loop"]:
+                break
+            time.sleep(options["interval"])
+        self.stdout.write(self.style.SUCCESS(
+            f"Reap complete: deleted {_summary(total)} in {time.monotonic() - started:.2f}s"
+        ))
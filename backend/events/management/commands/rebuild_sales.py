@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from events.sales import rebuild_sales
+
+
+class Command(BaseCommand):
+    help = "Recompute the per-event sales summary tables from the tickets."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--event", action="append", dest="events", help="Event id to rebuild (repeatable); all events by default.")
+
+    def handle(self, *args, **options):
+        rebuilt = rebuild_sales(options["events"])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt sales for {rebuilt} events"))
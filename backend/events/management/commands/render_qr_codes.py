@@ -0,0 +1,24 @@
+from itertools import islice
+
+from django.core.management.base import BaseCommand
+
+from events.models import Ticket
+from events.qr import render_qr_codes
+
+
+class Command(BaseCommand):
+    help = "Render QR images for paid tickets that do not have them yet."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000, help="Tickets rendered per pass.")
+
+    def handle(self, *args, **options):
+        values = (
+            Ticket.objects.filter(status__in=["paid", "checked_in"], qr_value__isnull=False)
+            .values_list("qr_value", flat=True)
+            .iterator(chunk_size=options["batch_size"])
+        )
+        rendered = 0
+        while batch := list(islice(values, options["batch_size"])):
+            rendered += render_qr_codes(batch)
+        self.stdout.write(self.style.SUCCESS(f"Rendered {rendered} QR images"))
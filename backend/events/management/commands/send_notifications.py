@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from events.notifications import drain_outbox
+
+
+class Command(BaseCommand):
+    help = "Deliver queued notification emails from the outbox."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=None)
+        parser.add_argument("--loop", action="store_true", help="Keep polling the outbox instead of exiting once it is empty.")
+        parser.add_argument("--interval", type=float, default=2.0, help="Seconds to sleep when the outbox is empty (with --loop).")
+
+    def handle(self, *args, **options):
+        total_sent = total_failed = 0
+        while True:
+            result = drain_outbox(batch_size=options["batch_size"])
+            total_sent += result["sent"]
+            total_failed += result["failed"]
+            if result["sent"] or result["failed"]:
+                self.stdout.write(f"Sent {result['sent']}, failed {result['failed']}")
+                continue
+            if not options["loop"]:
+                break
+            time.sleep(options["interval"])
+        self.stdout.write(self.style.SUCCESS(f"Outbox drained: {total_sent} sent, {total_failed} failed"))
@@ -0,0 +1,35 @@
+# Generated by Django 6.0.1 on 2026-10-18 10:03
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0008_notification'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tickettype',
+            name='reserved',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name='Reservation',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('payment_ref', models.CharField(max_length=100, unique=True)),
+                ('quantity', models.IntegerField()),
+                ('status', models.CharField(choices=[('held', 'Held'), ('confirmed', 'Confirmed'), ('released', 'Released')], default='held', max_length=20)),
+                ('expires_at', models.DateTimeField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('ticket_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reservations', to='events.tickettype')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'expires_at'], name='events_rese_status_9d4741_idx')],
+            },
+        ),
+    ]
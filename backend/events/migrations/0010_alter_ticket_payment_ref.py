@@ -0,0 +1,18 @@
+# Generated by Django 6.0.1 on 2026-10-18 11:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0009_reservation'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='ticket',
+            name='payment_ref',
+            field=models.CharField(blank=True, db_index=True, max_length=100, null=True),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 6.0.1 on 2026-10-18 11:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0010_alter_ticket_payment_ref'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='ticket',
+            name='payment_ref',
+            field=models.CharField(blank=True, max_length=100, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(fields=['event', 'code'], name='ticket_event_code_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(fields=['event', 'status', 'created_at'], name='ticket_event_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(fields=['payment_ref'], name='ticket_payment_ref_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 6.0.1 on 2026-10-18 10:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0013_webhookevent'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='attendee',
+            name='picture_variants',
+            field=models.JSONField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='event',
+            name='flyer_variants',
+            field=models.JSONField(blank=True, editable=False, null=True),
+        ),
+    ]
@@ -0,0 +1,65 @@
+# Generated by Django 6.0.1 on 2026-10-18 11:20
+
+import re
+from datetime import datetime
+
+from django.db import migrations, models
+from django.utils import timezone
+
+# A copy of events.dates.parse_event_datetime as it was when this migration
+# was written, so later changes to the parser do not change what it does.
+_WEEKDAY = re.compile(r"^[A-Za-z]{3,9},?\s+(?=[A-Za-z]{3})")
+_SEPARATORS = re.compile(r"\s*(?:·|•|\||@|\bat\b)\s*|\s+")
+
+_DATE_FORMATS = ["%b %d, %Y", "%B %d, %Y", "%b %d %Y", "%B %d %Y", "%d %b %Y", "%d %B %Y"]
+_TIME_FORMATS = ["%I:%M %p", "%I %p", "%I:%M%p", "%I%p", "%H:%M"]
+_FORMATS = [f"{d} {t}" for d in _DATE_FORMATS for t in _TIME_FORMATS] + _DATE_FORMATS
+
+
+def _aware(value):
+    return timezone.make_aware(value) if timezone.is_naive(value) else value
+
+
+def parse_event_datetime(value):
+    value = (value or "").strip()
+    if not value:
+        return None
+    try:
+        return _aware(datetime.fromisoformat(value))
+    except ValueError:
+        pass
+    text = _SEPARATORS.sub(" ", _WEEKDAY.sub("", value)).strip()
+    for fmt in _FORMATS:
+        try:
+            return _aware(datetime.strptime(text, fmt))
+        except ValueError:
+            pass
+    return None
+
+
+def parse_date_times(apps, schema_editor):
+    Event = apps.get_model('events', 'Event')
+    events = list(Event.objects.only('id', 'date_time'))
+    for event in events:
+        event.starts_at = parse_event_datetime(event.date_time)
+    Event.objects.bulk_update(events, ['starts_at'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0014_image_variants'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='event',
+            name='starts_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(parse_date_times, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['starts_at', 'id'], name='event_starts_at_idx'),
+        ),
+    ]
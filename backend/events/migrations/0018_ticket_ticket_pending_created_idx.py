@@ -0,0 +1,17 @@
+# Generated by Django 6.0.1 on 2026-10-18 15:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0017_event_admission_rate'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(condition=models.Q(('status', 'pending')), fields=['created_at'], name='ticket_pending_created_idx'),
+        ),
+    ]
@@ -0,0 +1,84 @@
+# Generated by Django 6.0.1 on 2026-10-18 16:05
+
+from collections import defaultdict
+
+from django.db import migrations, transaction
+from django.db.models import Count, Max
+from django.db.models.functions import Lower
+
+BATCH_SIZE = 500
+
+
+def _batches(items):
+    for start in range(0, len(items), BATCH_SIZE):
+        yield items[start:start + BATCH_SIZE]
+
+
+def merge_duplicate_attendees(apps, schema_editor):
+    """Fold attendees sharing an email into one, then link it to that email's user.
+
+    The kept attendee is the one linked to a user, else the one who bought
+    most recently; the others' tickets move to it. Emails shared by several
+    users' attendees are separate accounts and are left alone. Each batch
+    of emails is its own transaction.
+    """
+    Attendee = apps.get_model('events', 'Attendee')
+    Ticket = apps.get_model('events', 'Ticket')
+    User = apps.get_model('auth', 'User')
+
+    duplicated = (
+        Attendee.objects.annotate(key=Lower('email')).values('key')
+        .annotate(count=Count('id')).filter(count__gt=1).values('key')
+    )
+    groups = defaultdict(list)
+    for attendee_id, key in Attendee.objects.annotate(key=Lower('email')).filter(key__in=duplicated).values_list('id', 'key'):
+        groups[key].append(attendee_id)
+
+    for batch in _batches(list(groups.values())):
+        with transaction.atomic():
+            attendees = {
+                attendee.id: attendee
+                for attendee in Attendee.objects.filter(id__in=[i for ids in batch for i in ids])
+                .annotate(last_bought=Max('tickets__created_at'))
+            }
+            for ids in batch:
+                group = [attendees[i] for i in ids]
+                if sum(1 for attendee in group if attendee.user_id) > 1:
+                    continue
+                group.sort(key=lambda a: (a.user_id is not None, a.last_bought is not None, a.last_bought and a.last_bought.timestamp()), reverse=True)
+                keeper, duplicates = group[0], group[1:]
+                if not keeper.picture:
+                    donor = next((attendee for attendee in duplicates if attendee.picture), None)
+                    if donor is not None:
+                        keeper.picture, keeper.picture_variants = donor.picture.name, donor.picture_variants
+                        keeper.save(update_fields=['picture', 'picture_variants'])
+                Ticket.objects.filter(attendee__in=duplicates).update(attendee=keeper)
+                Attendee.objects.filter(id__in=[attendee.id for attendee in duplicates]).delete()
+
+    unlinked = list(Attendee.objects.filter(user__isnull=True).annotate(key=Lower('email')).values_list('id', 'key'))
+    for batch in _batches(unlinked):
+        users = defaultdict(list)
+        for user_id, key in (
+            User.objects.annotate(key=Lower('email'))
+            .filter(key__in={key for _, key in batch}, attendee_profile__isnull=True)
+            .values_list('id', 'key')
+        ):
+            users[key].append(user_id)
+        with transaction.atomic():
+            for attendee_id, key in batch:
+                if len(users.get(key, ())) == 1:
+                    Attendee.objects.filter(id=attendee_id, user__isnull=True).update(user_id=users.pop(key)[0])
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('events', '0018_ticket_ticket_pending_created_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_attendees, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 6.0.1 on 2026-10-18 18:40
+
+import django.db.models.expressions
+import django.db.models.functions.comparison
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0019_merge_duplicate_attendees'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(django.db.models.functions.comparison.Coalesce('starts_at', django.db.models.expressions.RawSQL("'9999-01-01 00:00:00'", (), output_field=models.DateTimeField())), models.F('id'), name='event_start_order_idx'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 6.0.1 on 2026-10-18 19:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0020_event_event_start_order_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ticket',
+            name='holder_age',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='ticket',
+            name='holder_name',
+            field=models.CharField(blank=True, default='', max_length=255),
+        ),
+        migrations.AddField(
+            model_name='ticket',
+            name='holder_phone',
+            field=models.CharField(blank=True, default='', max_length=20),
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 6.0.1 on 2026-10-18 19:40
+
+from django.db import migrations
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncDate
+
+SOLD_STATUSES = ['paid', 'checked_in']
+
+
+def backfill_sales(apps, schema_editor):
+    """Fill the sales summary tables from the tickets, as ``manage.py rebuild_sales`` does.
+
+    0016 created the tables empty, so tickets sold before it were missing
+    from the stats; any rows recorded since are recomputed along with them.
+    """
+    Ticket = apps.get_model('events', 'Ticket')
+    TicketTypeSales = apps.get_model('events', 'TicketTypeSales')
+    DailySales = apps.get_model('events', 'DailySales')
+
+    sold = Q(status__in=SOLD_STATUSES)
+    per_type = (
+        Ticket.objects.values('ticket_type_id', 'event_id')
+        .annotate(
+            sold=Count('id', filter=sold),
+            checked_in=Count('id', filter=Q(status='checked_in')),
+            cancelled=Count('id', filter=Q(status='cancelled')),
+            revenue=Sum('ticket_type__price', filter=sold, default=0),
+        )
+        .order_by()
+    )
+    per_day = (
+        Ticket.objects.filter(sold)
+        .annotate(day=TruncDate('created_at'))
+        .values('event_id', 'day')
+        .annotate(sold=Count('id'), revenue=Sum('ticket_type__price'))
+        .order_by()
+    )
+    TicketTypeSales.objects.all().delete()
+    DailySales.objects.all().delete()
+    TicketTypeSales.objects.bulk_create([TicketTypeSales(**row) for row in per_type], batch_size=500)
+    DailySales.objects.bulk_create([DailySales(**row) for row in per_day], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0021_ticket_holder_details'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_sales, migrations.RunPython.noop),
+    ]
@@ -1,15 +1,49 @@
 from django.db import models
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Coalesce
+from django.utils import timezone
 from django.contrib.auth.models import User
 import uuid
 
+from .dates import UNDATED, parse_event_datetime
+
+# starts_at, or UNDATED for events without one. The sentinel is inlined
+# rather than a query parameter so SQLite can match event_start_order_idx.
+START_ORDER = Coalesce(
+    'starts_at', RawSQL(f"'{UNDATED:%Y-%m-%d %H:%M:%S}'", (), output_field=models.DateTimeField()),
+)
+
 class Event(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     title = models.CharField(max_length=255)
     date_time = models.CharField(max_length=100)  # Keeping it as char for now to match frontend wireframe format
+    # date_time parsed (events/dates.py), for sorting and date filters; null
+    # when date_time is not a recognisable date.
+    starts_at = models.DateTimeField(null=True, blank=True, editable=False)
     venue = models.CharField(max_length=255)
     description = models.TextField()
     flyer = models.ImageField(upload_to='flyers/', null=True, blank=True)
+    # Resized copies of the flyer, written by `manage.py process_images`.
+    flyer_variants = models.JSONField(null=True, blank=True, editable=False)
     status = models.CharField(max_length=50, default='published')
+    # Buyers let through the waiting room per minute (events/waiting_room.py);
+    # empty means no waiting room.
+    admission_rate = models.PositiveIntegerField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Catalogue order and date range scans; id breaks ties.
+            models.Index(fields=['starts_at', 'id'], name='event_starts_at_idx'),
+            # Cursor pages (events/pagination.py), undated events last.
+            models.Index(START_ORDER, 'id', name='event_start_order_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        self.starts_at = parse_event_datetime(self.date_time)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'date_time' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'starts_at'}
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return self.title
@@ -21,10 +55,33 @@ class TicketType(models.Model):
     price = models.DecimalField(max_digits=10, decimal_places=2, default=0)
     limit = models.IntegerField()
     sold_count = models.IntegerField(default=0)
+    reserved = models.IntegerField(default=0)
 
     def __str__(self):
         return f"{self.event.title} - {self.name}"
 
+class Reservation(models.Model):
+    STATUS_CHOICES = [
+        ('held', 'Held'),
+        ('confirmed', 'Confirmed'),
+        ('released', 'Released'),
+    ]
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    ticket_type = models.ForeignKey(TicketType, related_name='reservations', on_delete=models.CASCADE)
+    payment_ref = models.CharField(max_length=100, unique=True)
+    quantity = models.IntegerField()
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='held')
+    expires_at = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'expires_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.payment_ref} - {self.quantity} x {self.ticket_type_id} ({self.status})"
+
 class Attendee(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='attendee_profile', null=True, blank=True)
@@ -33,6 +90,7 @@ class Attendee(models.Model):
     age = models.IntegerField()
     phone = models.CharField(max_length=20)
     picture = models.ImageField(upload_to='attendees/', null=True, blank=True)
+    picture_variants = models.JSONField(null=True, blank=True, editable=False)
 
     def __str__(self):
         return self.full_name
@@ -49,16 +107,40 @@ class Ticket(models.Model):
     ticket_type = models.ForeignKey(TicketType, on_delete=models.CASCADE)
     attendee = models.ForeignKey(Attendee, related_name='tickets', on_delete=models.CASCADE)
     code = models.CharField(max_length=20, unique=True, null=True, blank=True)
-    payment_ref = models.CharField(max_length=100, null=True, blank=True, unique=True)
+    payment_ref = models.CharField(max_length=100, null=True, blank=True)
     qr_value = models.CharField(max_length=255, null=True, blank=True)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    # The details typed at checkout for this order (events/attendees.py);
+    # the attendee keeps the ones its owner gave.
+    holder_name = models.CharField(max_length=255, blank=True, default='')
+    holder_age = models.IntegerField(null=True, blank=True)
+    holder_phone = models.CharField(max_length=20, blank=True, default='')
     created_at = models.DateTimeField(auto_now_add=True)
+    # Bulk .update() calls must set this themselves; scanner deltas read it.
+    updated_at = models.DateTimeField(auto_now=True)
 
-    def save(self, *args, **kwargs):
+    class Meta:
+        indexes = [
+            # Gate verification: code lookup scoped to an event.
+            models.Index(fields=['event', 'code'], name='ticket_event_code_idx'),
+            # Admin ticket lists filtered by event/status, newest first.
+            models.Index(fields=['event', 'status', 'created_at'], name='ticket_event_status_idx'),
+            models.Index(fields=['payment_ref'], name='ticket_payment_ref_idx'),
+            # Scanner delta feed.
+            models.Index(fields=['event', 'updated_at'], name='ticket_event_updated_idx'),
+            # Abandoned checkouts for the reaper, oldest first.
+            models.Index(fields=['created_at'], name='ticket_pending_created_idx', condition=models.Q(status='pending')),
+        ]
+
+    def assign_code(self):
+        """Give a paid ticket its entry code and QR value, in memory only."""
         if self.status == "paid" and not self.code:
             self.code = f"TKT-{uuid.uuid4().hex[:8].upper()}"
         if self.status == "paid" and not self.qr_value:
             self.qr_value = self.code or (self.id.hex if self.id else uuid.uuid4().hex)
+
+    def save(self, *args, **kwargs):
+        self.assign_code()
         super().save(*args, **kwargs)
 
     def __str__(self):
@@ -68,7 +150,89 @@ class CheckIn(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     ticket = models.ForeignKey(Ticket, related_name='check_ins', on_delete=models.CASCADE)
     checked_in_by = models.CharField(max_length=255)
-    checked_in_at = models.DateTimeField(auto_now_add=True)
+    # Offline scanners upload the time of the scan, not of the sync.
+    checked_in_at = models.DateTimeField(default=timezone.now)
 
     def __str__(self):
         return f"Check-in for {self.ticket.code} at {self.checked_in_at}"
+
+class Notification(models.Model):
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    ]
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    payment_ref = models.CharField(max_length=100, null=True, blank=True)
+    recipient = models.EmailField()
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    attempts = models.IntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} -> {self.recipient} ({self.status})"
+
+class WebhookEvent(models.Model):
+    """A Paystack webhook delivery, stored before it is acted on.
+
+    ``event_key`` identifies the delivery across Paystack's retries, so a
+    redelivered webhook is dropped at insert time.
+    """
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('processed', 'Processed'),
+        ('ignored', 'Ignored'),
+        ('failed', 'Failed'),
+    ]
+    event_key = models.CharField(max_length=255, unique=True)
+    event_type = models.CharField(max_length=100)
+    reference = models.CharField(max_length=100, blank=True, db_index=True)
+    payload = models.JSONField()
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    attempts = models.IntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    received_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.event_type} {self.reference} ({self.status})"
+
+class TicketTypeSales(models.Model):
+    """Running sales totals for a ticket type, kept by events/sales.py.
+
+    ``sold`` counts tickets ever paid for, including those since checked in.
+    """
+    ticket_type = models.OneToOneField(TicketType, primary_key=True, related_name='sales', on_delete=models.CASCADE)
+    event = models.ForeignKey(Event, related_name='ticket_type_sales', on_delete=models.CASCADE)
+    sold = models.IntegerField(default=0)
+    checked_in = models.IntegerField(default=0)
+    cancelled = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+class DailySales(models.Model):
+    """Tickets sold per event per day (the day the order was placed)."""
+    event = models.ForeignKey(Event, related_name='daily_sales', on_delete=models.CASCADE)
+    day = models.DateField()
+    sold = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['event', 'day'], name='daily_sales_event_day_uniq'),
+        ]
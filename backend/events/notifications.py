@@ -0,0 +1,142 @@
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Notification, Ticket
+from .qr import read_qr, render_qr_codes
+
+logger = logging.getLogger(__name__)
+
+
+def queue_ticket_email(tickets):
+    """Store the confirmation email for ``tickets`` in the outbox.
+
+    Nothing is sent here; ``manage.py send_notifications`` delivers it.
+    """
+    if not settings.EMAIL_HOST_USER:
+        return None
+
+    tickets = list(tickets.select_related("event", "attendee"))
+    if not tickets:
+        return None
+    main_ticket = tickets[0]
+
+    codes = ", ".join([t.code for t in tickets if t.code])
+
+    subject = f"Your Tickets for {main_ticket.event.title}"
+    message = f"Hello {main_ticket.attendee.full_name},\n\nYour tickets for {main_ticket.event.title} have been confirmed!\n\nTicket Codes: {codes}\nVenue: {main_ticket.event.venue}\nDate: {main_ticket.event.date_time}\n\nShow these codes or the QR codes at the entrance.\n\nEnjoy the event!"
+
+    return Notification.objects.create(
+        payment_ref=main_ticket.payment_ref,
+        recipient=main_ticket.attendee.email,
+        subject=subject,
+        body=message,
+    )
+
+
+def _retry_delay(attempts):
+    delay = settings.NOTIFICATION_RETRY_BASE_SECONDS * (2 ** (attempts - 1))
+    return timedelta(seconds=min(delay, settings.NOTIFICATION_RETRY_MAX_SECONDS))
+
+
+def _claim_batch(batch_size):
+    # Claiming pushes next_attempt_at forward by a lease instead of using a
+    # separate "sending" status, so rows held by a crashed worker become due
+    # again on their own once the lease runs out.
+    now = timezone.now()
+    with transaction.atomic():
+        batch = list(
+            Notification.objects.select_for_update(skip_locked=True)
+            .filter(status="pending", next_attempt_at__lte=now)
+            .order_by("next_attempt_at")[:batch_size]
+        )
+        if batch:
+            lease = now + timedelta(seconds=settings.NOTIFICATION_LEASE_SECONDS)
+            Notification.objects.filter(id__in=[n.id for n in batch]).update(next_attempt_at=lease)
+    return batch
+
+
+def _record_failure(notification, error, now):
+    notification.attempts += 1
+    notification.last_error = str(error)
+    if notification.attempts >= settings.NOTIFICATION_MAX_ATTEMPTS:
+        notification.status = "failed"
+    else:
+        notification.next_attempt_at = now + _retry_delay(notification.attempts)
+
+
+def _qr_attachments(batch):
+    # One query and one (possibly pooled) render pass for the whole batch.
+    refs = {n.payment_ref for n in batch if n.payment_ref}
+    tickets = list(
+        Ticket.objects.filter(payment_ref__in=refs, status__in=["paid", "checked_in"], qr_value__isnull=False)
+        .order_by("created_at")
+        .values_list("payment_ref", "code", "qr_value")
+    )
+    attachments = {}
+    try:
+        render_qr_codes([qr_value for _, _, qr_value in tickets], formats=("png",))
+        for ref, code, qr_value in tickets:
+            attachments.setdefault(ref, []).append((f"{code or 'ticket'}.png", read_qr(qr_value), "image/png"))
+    except Exception as e:
+        # Codes are in the body as text, so send without images.
+        logger.warning("Outbox could not attach QR codes: %s", e)
+        return {}
+    return attachments
+
+
+def drain_outbox(batch_size=None, connection=None):
+    """Send one batch of due notifications over a single SMTP connection.
+
+    Returns a dict with the number of messages sent and failed.
+    """
+    batch = _claim_batch(batch_size or settings.NOTIFICATION_BATCH_SIZE)
+    if not batch:
+        return {"sent": 0, "failed": 0}
+
+    attachments = _qr_attachments(batch)
+    connection = connection or get_connection()
+    now = timezone.now()
+    sent = failed = 0
+    try:
+        connection.open()
+    except Exception as e:
+        logger.warning("Outbox could not open mail connection: %s", e)
+        for notification in batch:
+            _record_failure(notification, e, now)
+        failed = len(batch)
+    else:
+        try:
+            for notification in batch:
+                message = EmailMessage(
+                    notification.subject,
+                    notification.body,
+                    settings.DEFAULT_FROM_EMAIL,
+                    [notification.recipient],
+                    connection=connection,
+                )
+                for attachment in attachments.get(notification.payment_ref, []):
+                    message.attach(*attachment)
+                try:
+                    message.send()
+                except Exception as e:
+                    logger.warning("Outbox send to %s failed: %s", notification.recipient, e)
+                    _record_failure(notification, e, now)
+                    failed += 1
+                else:
+                    notification.status = "sent"
+                    notification.sent_at = timezone.now()
+                    notification.attempts += 1
+                    sent += 1
+        finally:
+            connection.close()
+
+    Notification.objects.bulk_update(
+        batch,
+        ["status", "attempts", "next_attempt_at", "last_error", "sent_at"],
+    )
+    return {"sent": sent, "failed": failed}
@@ -0,0 +1,24 @@
+from rest_framework.pagination import CursorPagination
+
+from .models import START_ORDER
+
+
+class EventCursorPagination(CursorPagination):
+    """Cursor pagination for the public catalogue.
+
+    Opt-in: requests without ``cursor`` or ``page_size`` still get the plain
+    list the frontend expects. Pages run in start order off
+    event_start_order_idx. A cursor cannot hold a NULL position, so events
+    whose date could not be parsed sort at UNDATED, after the dated ones.
+    """
+    ordering = ("start_order", "id")
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 200
+
+    def paginate_queryset(self, queryset, request, view=None):
+        params = request.query_params
+        if self.cursor_query_param not in params and self.page_size_query_param not in params:
+            return None
+        queryset = queryset.annotate(start_order=START_ORDER)
+        return super().paginate_queryset(queryset, request, view)
@@ -0,0 +1,296 @@
+"""Paystack API client.
+
+Every call goes through one keep-alive session per process (or per event
+loop, for the async functions) with short connect/read timeouts. Transient
+failures are retried with jittered backoff within PAYSTACK_TOTAL_TIMEOUT
+for the whole call, and a shared circuit breaker
+fails calls immediately while Paystack keeps failing, so a Paystack outage
+costs requests milliseconds instead of a worker for the full timeout.
+
+Results are dicts: ``{"ok": True, ...}`` on success, otherwise
+``{"ok": False}``, with ``"unavailable": True`` when Paystack could not be
+reached (as opposed to declining the request).
+"""
+import asyncio
+import logging
+import random
+import threading
+import time
+import weakref
+
+import aiohttp
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import ConnectTimeoutError
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE_STATUSES = {502, 503, 504}
+
+
+class GatewayUnavailable(Exception):
+    pass
+
+
+class CircuitBreaker:
+    """Opens after ``PAYSTACK_BREAKER_THRESHOLD`` consecutive failures.
+
+    While open, calls fail without touching the network. After
+    ``PAYSTACK_BREAKER_RESET_SECONDS`` one call is let through; its outcome
+    closes the breaker again or restarts the wait.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self.probing = False
+
+    def allow(self):
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if self.probing or time.monotonic() - self.opened_at < settings.PAYSTACK_BREAKER_RESET_SECONDS:
+                return False
+            self.probing = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self.probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.probing or (self.opened_at is None and self.failures >= settings.PAYSTACK_BREAKER_THRESHOLD):
+                if not self.probing:
+                    logger.warning("Paystack circuit opened after %s failures", self.failures)
+                self.opened_at = time.monotonic()
+                self.probing = False
+
+
+breaker = CircuitBreaker()
+
+_session = None
+_session_lock = threading.Lock()
+_async_sessions = weakref.WeakKeyDictionary()
+
+
+def _get_session():
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_maxsize=settings.PAYSTACK_POOL_SIZE)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _session = session
+    return _session
+
+
+def _get_async_session():
+    # aiohttp sessions are bound to the loop they were created on.
+    loop = asyncio.get_running_loop()
+    session = _async_sessions.get(loop)
+    if session is None or session.closed:
+        session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=settings.PAYSTACK_POOL_SIZE),
+            timeout=aiohttp.ClientTimeout(
+                sock_connect=settings.PAYSTACK_CONNECT_TIMEOUT,
+                sock_read=settings.PAYSTACK_READ_TIMEOUT,
+            ),
+        )
+        _async_sessions[loop] = session
+    return session
+
+
+async def close_async_session():
+    """Close the aiohttp session of the running event loop, if any."""
+    session = _async_sessions.pop(asyncio.get_running_loop(), None)
+    if session is not None:
+        await session.close()
+
+
+def _headers():
+    return {
+        "Authorization": f"Bearer {settings.PAYSTACK_SECRET_KEY}",
+        "Content-Type": "application/json",
+    }
+
+
+def _backoff(attempt):
+    # Full jitter, so clients that failed together do not retry together.
+    cap = settings.PAYSTACK_RETRY_BASE_SECONDS * (2 ** attempt)
+    return random.uniform(0, cap)
+
+
+def _never_sent(error):
+    # NewConnectionError (refused, DNS) subclasses ConnectTimeoutError.
+    reason = getattr(error.args[0], "reason", None) if error.args else None
+    return isinstance(error, requests.ConnectTimeout) or isinstance(reason, ConnectTimeoutError)
+
+
+def _initialize_request(email, amount, reference):
+    payload = {
+        "email": email,
+        "amount": int(amount * 100),
+        "reference": reference,
+    }
+    if settings.PAYSTACK_CALLBACK_URL:
+        payload["callback_url"] = settings.PAYSTACK_CALLBACK_URL
+    # A POST that timed out may still have created the transaction, and
+    # resending the same reference would then be rejected, so only retry
+    # when the request never got through.
+    return "POST", "/transaction/initialize", payload, False
+
+
+def _verify_request(reference):
+    return "GET", f"/transaction/verify/{reference}", None, True
+
+
+def _initialize_result(status_code, data):
+    if status_code != 200 or not data.get("status"):
+        return {"ok": False}
+    return {"ok": True, "authorization_url": data["data"]["authorization_url"]}
+
+
+def _verify_result(status_code, data):
+    if status_code != 200 or not data.get("status") or data.get("data", {}).get("status") != "success":
+        return {"ok": False}
+    return {"ok": True, "payload": data["data"]}
+
+
+def _call(method, path, payload, idempotent):
+    if not breaker.allow():
+        raise GatewayUnavailable("circuit open")
+    url = settings.PAYSTACK_BASE_URL.rstrip("/") + path
+    deadline = time.monotonic() + settings.PAYSTACK_TOTAL_TIMEOUT
+    attempt = 0
+    succeeded = False
+    try:
+        while True:
+            remaining = deadline - time.monotonic()
+            timeout = (min(settings.PAYSTACK_CONNECT_TIMEOUT, remaining), min(settings.PAYSTACK_READ_TIMEOUT, remaining))
+            try:
+                response = _get_session().request(method, url, headers=_headers(), json=payload, timeout=timeout)
+            except requests.RequestException as e:
+                error = e
+                retryable = idempotent or _never_sent(e)
+            else:
+                if response.status_code not in RETRYABLE_STATUSES:
+                    breaker.record_success()
+                    succeeded = True
+                    try:
+                        data = response.json()
+                    except ValueError:
+                        data = {}
+                    return response.status_code, data
+                error = GatewayUnavailable(f"HTTP {response.status_code}")
+                retryable = idempotent
+            delay = _backoff(attempt)
+            if not retryable or attempt >= settings.PAYSTACK_MAX_RETRIES or time.monotonic() + delay >= deadline:
+                raise GatewayUnavailable(str(error)) from error
+            time.sleep(delay)
+            attempt += 1
+    finally:
+        # Whatever ended the call, so a half-open probe is never left hanging.
+        if not succeeded:
+            breaker.record_failure()
+
+
+async def _acall(method, path, payload, idempotent):
+    if not breaker.allow():
+        raise GatewayUnavailable("circuit open")
+    url = settings.PAYSTACK_BASE_URL.rstrip("/") + path
+    deadline = time.monotonic() + settings.PAYSTACK_TOTAL_TIMEOUT
+    attempt = 0
+    succeeded = False
+    try:
+        while True:
+            timeout = aiohttp.ClientTimeout(
+                total=deadline - time.monotonic(),
+                sock_connect=settings.PAYSTACK_CONNECT_TIMEOUT,
+                sock_read=settings.PAYSTACK_READ_TIMEOUT,
+            )
+            try:
+                async with _get_async_session().request(
+                    method, url, headers=_headers(), json=payload, timeout=timeout
+                ) as response:
+                    if response.status not in RETRYABLE_STATUSES:
+                        breaker.record_success()
+                        succeeded = True
+                        try:
+                            data = await response.json(content_type=None)
+                        except ValueError:
+                            data = {}
+                        return response.status, data
+                    error = GatewayUnavailable(f"HTTP {response.status}")
+                    retryable = idempotent
+            except (aiohttp.ClientConnectorError, aiohttp.ConnectionTimeoutError) as e:
+                error = e
+                retryable = True
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                error = e
+                retryable = idempotent
+            delay = _backoff(attempt)
+            if not retryable or attempt >= settings.PAYSTACK_MAX_RETRIES or time.monotonic() + delay >= deadline:
+                raise GatewayUnavailable(str(error) or type(error).__name__) from error
+            await asyncio.sleep(delay)
+            attempt += 1
+    finally:
+        # Cancellation included, so a half-open probe is never left hanging.
+        if not succeeded:
+            breaker.record_failure()
+
+
+def _unavailable(error):
+    logger.warning("Paystack unavailable: %s", error)
+    return {"ok": False, "unavailable": True}
+
+
+def initialize_transaction(email, amount, reference):
+    """Start a transaction for ``amount`` (in naira) and return its checkout URL."""
+    if not settings.PAYSTACK_SECRET_KEY:
+        return {"ok": False}
+    try:
+        return _initialize_result(*_call(*_initialize_request(email, amount, reference)))
+    except GatewayUnavailable as e:
+        return _unavailable(e)
+
+
+def verify_transaction(reference):
+    """Return the transaction for ``reference`` if Paystack reports it successful."""
+    if not settings.PAYSTACK_SECRET_KEY:
+        return {"ok": False}
+    try:
+        return _verify_result(*_call(*_verify_request(reference)))
+    except GatewayUnavailable as e:
+        return _unavailable(e)
+
+
+async def ainitialize_transaction(email, amount, reference):
+    """Async version of :func:`initialize_transaction` for ASGI views."""
+    if not settings.PAYSTACK_SECRET_KEY:
+        return {"ok": False}
+    try:
+        return _initialize_result(*await _acall(*_initialize_request(email, amount, reference)))
+    except GatewayUnavailable as e:
+        return _unavailable(e)
+
+
+async def averify_transaction(reference):
+    """Async version of :func:`verify_transaction` for ASGI views."""
+    if not settings.PAYSTACK_SECRET_KEY:
+        return {"ok": False}
+    try:
+        return _verify_result(*await _acall(*_verify_request(reference)))
+    except GatewayUnavailable as e:
+        return _unavailable(e)
@@ -0,0 +1,119 @@
+"""Server-side QR code images for tickets.
+
+Images are stored content-addressed: the storage path is derived from a
+hash of what is rendered (format, render settings and ``qr_value``), so
+each image is rendered once, never changes, and can be cached forever by
+browsers. Orders are rendered when they are finalized. Big batches
+(backfills, large orders) go to a process pool, because rendering is
+CPU-bound and would otherwise serialise on the GIL.
+"""
+import hashlib
+import io
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+
+# Bump when the rendering below changes, so new images get new addresses.
+RENDER_VERSION = 1
+
+QR_FORMATS = {"png": "image/png", "svg": "image/svg+xml"}
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def qr_digest(value, fmt):
+    return hashlib.sha256(f"{RENDER_VERSION}:{fmt}:{value}".encode()).hexdigest()
+
+
+def qr_path(digest, fmt):
+    return f"qr/{digest[:2]}/{digest}.{fmt}"
+
+
+def qr_storage_path(value, fmt):
+    return qr_path(qr_digest(value, fmt), fmt)
+
+
+def render_qr(value, fmt):
+    """Render ``value`` as a PNG or SVG QR code and return the bytes.
+
+    Runs in pool workers, so it must not touch Django.
+    """
+    import qrcode
+    from qrcode.image.svg import SvgPathImage
+
+    qr = qrcode.QRCode(error_correction=qrcode.constants.ERROR_CORRECT_M, box_size=10, border=4)
+    qr.add_data(value)
+    qr.make(fit=True)
+    buffer = io.BytesIO()
+    if fmt == "svg":
+        qr.make_image(image_factory=SvgPathImage).save(buffer)
+    else:
+        qr.make_image().save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def _render_job(job):
+    value, fmt = job
+    return render_qr(value, fmt)
+
+
+def _get_pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                # Spawned rather than forked: web and worker processes run
+                # threads, and forking those can deadlock the children.
+                _pool = ProcessPoolExecutor(
+                    max_workers=settings.QR_RENDER_WORKERS,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+    return _pool
+
+
+def render_qr_codes(values, formats=("png", "svg")):
+    """Make sure images exist for every ``qr_value`` in ``values``.
+
+    Returns the number of images rendered; ones already stored are skipped.
+    """
+    jobs = [
+        (value, fmt)
+        for value in dict.fromkeys(v for v in values if v)
+        for fmt in formats
+        if not default_storage.exists(qr_storage_path(value, fmt))
+    ]
+    if not jobs:
+        return 0
+    if settings.QR_RENDER_WORKERS and len(jobs) > settings.QR_INLINE_MAX:
+        images = _get_pool().map(_render_job, jobs, chunksize=max(1, len(jobs) // (settings.QR_RENDER_WORKERS * 4)))
+    else:
+        images = map(_render_job, jobs)
+    for (value, fmt), image in zip(jobs, images):
+        path = qr_storage_path(value, fmt)
+        # Another process may have stored the same image meanwhile; its
+        # bytes are identical, so keep whichever landed first.
+        if not default_storage.exists(path):
+            default_storage.save(path, ContentFile(image))
+    return len(jobs)
+
+
+def qr_urls(value, request=None):
+    """URLs of the images for ``value``, by format."""
+    if not value:
+        return None
+    urls = {fmt: f"/api/qr/{qr_digest(value, fmt)}.{fmt}" for fmt in QR_FORMATS}
+    if request is not None:
+        urls = {fmt: request.build_absolute_uri(url) for fmt, url in urls.items()}
+    return urls
+
+
+def read_qr(value, fmt="png"):
+    """Stored image bytes for ``value``, rendering it first if needed."""
+    render_qr_codes([value], formats=(fmt,))
+    with default_storage.open(qr_storage_path(value, fmt)) as image:
+        return image.read()
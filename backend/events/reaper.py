@@ -0,0 +1,147 @@
+"""Clean-up of abandoned checkouts.
+
+initialize_payment writes pending tickets, an attendee and possibly a user
+before the buyer ever reaches Paystack, and a buyer who never pays leaves
+them behind. ``reap_pending_orders`` deletes orders still pending
+PENDING_ORDER_TTL_SECONDS after they were placed, one bounded batch per
+transaction:
+
+- the tickets, and their seat hold if the sweeper has not released it;
+- the order's reservation row;
+- the attendee, once it has no tickets left, and its picture files if
+  no other attendee shares them;
+- the user the purchase created, once it has no attendee: one that
+  joined while the order was being placed, has no password and has never
+  logged in. Accounts that existed before the order are left alone.
+
+Orders with a webhook delivery still pending or failed are left alone:
+Paystack may have taken the money and someone needs to look. The TTL must
+stay well past how long a Paystack checkout remains payable, since a late
+payment for a reaped order finds nothing to settle.
+
+With ``archive``, each reaped order is appended as one JSON line to that
+gzip file before its batch commits.
+"""
+import gzip
+import json
+from collections import Counter, defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils import timezone
+
+from .attendees import release_pictures
+from .models import Attendee, Reservation, Ticket, WebhookEvent
+from .reservations import release_seats
+
+# initialize_payment creates the buyer's user moments before their tickets.
+_SIGNUP_WINDOW = timedelta(minutes=1)
+
+
+def _expired_refs(cutoff, batch_size):
+    refs = (
+        Ticket.objects.filter(status="pending", created_at__lt=cutoff, payment_ref__isnull=False)
+        .exclude(payment_ref__in=WebhookEvent.objects.filter(status__in=["pending", "failed"]).values("reference"))
+        .order_by("created_at")
+        .values_list("payment_ref", flat=True)[:batch_size]
+    )
+    return list(dict.fromkeys(refs))
+
+
+def _order_record(payment_ref, tickets):
+    attendee = tickets[0].attendee
+    return {
+        "payment_ref": payment_ref,
+        "event": tickets[0].event_id,
+        "ticket_type": tickets[0].ticket_type_id,
+        "quantity": len(tickets),
+        "created_at": tickets[0].created_at,
+        "tickets": [ticket.id for ticket in tickets],
+        "holder": {
+            "full_name": tickets[0].holder_name,
+            "age": tickets[0].holder_age,
+            "phone": tickets[0].holder_phone,
+        },
+        "attendee": {
+            "id": attendee.id,
+            "user": attendee.user_id,
+            "full_name": attendee.full_name,
+            "email": attendee.email,
+            "age": attendee.age,
+            "phone": attendee.phone,
+            "picture": attendee.picture.name or None,
+        },
+    }
+
+
+def _write_archive(path, records):
+    with gzip.open(path, "at", encoding="utf-8") as archive:
+        for record in records:
+            archive.write(json.dumps(record, cls=DjangoJSONEncoder) + "\n")
+
+
+def reap_pending_orders(batch_size=500, ttl=None, archive=None):
+    """Delete one batch of abandoned orders and what hangs off them.
+
+    A batch is the orders of the oldest ``batch_size`` expired tickets, so
+    whole orders go together. ``ttl`` (seconds) defaults to
+    PENDING_ORDER_TTL_SECONDS. Returns the rows deleted per model label,
+    e.g. ``{"events.Ticket": 3, ...}``; an empty Counter means nothing was
+    left to reap.
+    """
+    ttl = settings.PENDING_ORDER_TTL_SECONDS if ttl is None else ttl
+    cutoff = timezone.now() - timedelta(seconds=ttl)
+    deleted = Counter()
+    refs = _expired_refs(cutoff, batch_size)
+    if not refs:
+        return deleted
+
+    with transaction.atomic():
+        # Locked so a payment settling now either finishes first (and the
+        # order is no longer pending) or finds the order gone.
+        orders = defaultdict(list)
+        for ticket in (
+            Ticket.objects.select_for_update(of=("self",))
+            .filter(payment_ref__in=refs, status="pending", created_at__lt=cutoff)
+            .select_related("attendee")
+            .order_by("created_at")
+        ):
+            orders[ticket.payment_ref].append(ticket)
+        if not orders:
+            return deleted
+
+        for payment_ref in list(Reservation.objects.filter(payment_ref__in=orders, status="held")
+                                .values_list("payment_ref", flat=True)):
+            release_seats(payment_ref)
+        records = [_order_record(payment_ref, tickets) for payment_ref, tickets in orders.items()] if archive else []
+
+        deleted.update(Ticket.objects.filter(
+            id__in=[ticket.id for tickets in orders.values() for ticket in tickets]
+        ).delete()[1])
+        deleted.update(Reservation.objects.filter(payment_ref__in=orders).delete()[1])
+
+        attendees = list(Attendee.objects.filter(
+            id__in={tickets[0].attendee_id for tickets in orders.values()}, tickets__isnull=True,
+        ))
+        pictures = [(attendee.picture.name, attendee.picture_variants) for attendee in attendees if attendee.picture]
+        deleted.update(Attendee.objects.filter(id__in=[attendee.id for attendee in attendees]).delete()[1])
+        ordered_at = {}
+        for tickets in orders.values():
+            ordered_at.setdefault(tickets[0].attendee_id, tickets[0].created_at)
+        user_ordered_at = {attendee.user_id: ordered_at[attendee.id] for attendee in attendees if attendee.user_id}
+        created_for_order = [
+            user.id for user in User.objects.filter(
+                id__in=user_ordered_at, attendee_profile__isnull=True, password="", last_login__isnull=True,
+                is_staff=False, is_superuser=False,
+            ).only("id", "date_joined")
+            if user_ordered_at[user.id] - _SIGNUP_WINDOW <= user.date_joined <= user_ordered_at[user.id]
+        ]
+        deleted.update(User.objects.filter(id__in=created_for_order).delete()[1])
+
+        if archive:
+            _write_archive(archive, records)
+        transaction.on_commit(lambda: release_pictures(pictures))
+    return +deleted
@@ -0,0 +1,94 @@
+"""Seat holds for in-flight orders.
+
+Every change to ``TicketType.sold_count``/``reserved`` is a single
+conditional UPDATE, and every change to a ``Reservation`` moves it out of
+``held`` with a conditional UPDATE as well, so concurrent buyers, payment
+confirmations and the sweeper never need row locks to stay consistent.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Reservation, TicketType
+
+
+def reserve_seats(ticket_type_id, quantity, payment_ref):
+    """Hold ``quantity`` seats for ``payment_ref``.
+
+    Returns the Reservation, or None if there are not enough seats left.
+    """
+    with transaction.atomic():
+        updated = TicketType.objects.filter(
+            id=ticket_type_id,
+            limit__gte=F("sold_count") + F("reserved") + quantity,
+        ).update(reserved=F("reserved") + quantity)
+        if not updated:
+            return None
+        return Reservation.objects.create(
+            ticket_type_id=ticket_type_id,
+            payment_ref=payment_ref,
+            quantity=quantity,
+            expires_at=timezone.now() + timedelta(seconds=settings.RESERVATION_TTL_SECONDS),
+        )
+
+
+def _take_held(payment_ref, new_status, **filters):
+    # Only one caller can move a reservation out of "held"; whoever does
+    # owns its seats. Writing before reading also means SQLite never has to
+    # upgrade a read lock, which fails instead of waiting.
+    moved = Reservation.objects.filter(payment_ref=payment_ref, status="held", **filters).update(status=new_status)
+    if not moved:
+        return None
+    return Reservation.objects.get(payment_ref=payment_ref)
+
+
+def confirm_seats(payment_ref, ticket_type_id, quantity):
+    """Turn the hold for ``payment_ref`` into sold seats.
+
+    Orders whose hold has already been released (or never existed) are
+    sold only if seats are still free. Returns False when they are not.
+    """
+    with transaction.atomic():
+        reservation = _take_held(payment_ref, "confirmed")
+        if reservation is not None:
+            TicketType.objects.filter(id=reservation.ticket_type_id).update(
+                sold_count=F("sold_count") + reservation.quantity,
+                reserved=F("reserved") - reservation.quantity,
+            )
+            return True
+        return bool(
+            TicketType.objects.filter(
+                id=ticket_type_id,
+                limit__gte=F("sold_count") + F("reserved") + quantity,
+            ).update(sold_count=F("sold_count") + quantity)
+        )
+
+
+def _release(payment_ref, **filters):
+    with transaction.atomic():
+        reservation = _take_held(payment_ref, "released", **filters)
+        if reservation is None:
+            return False
+        TicketType.objects.filter(id=reservation.ticket_type_id).update(
+            reserved=F("reserved") - reservation.quantity
+        )
+        return True
+
+
+def release_seats(payment_ref):
+    """Give the seats held for ``payment_ref`` back. Returns True if any were held."""
+    return _release(payment_ref)
+
+
+def release_expired_reservations(batch_size=500):
+    """Release holds whose TTL has passed. Returns the number released."""
+    now = timezone.now()
+    expired = list(
+        Reservation.objects.filter(status="held", expires_at__lte=now)
+        .order_by("expires_at")
+        .values_list("payment_ref", flat=True)[:batch_size]
+    )
+    return sum(_release(payment_ref, expires_at__lte=now) for payment_ref in expired)
@@ -0,0 +1,94 @@
+"""Versioned response cache for the public event endpoints.
+
+Every event has a version counter, and the catalogue has one that moves
+whenever any event does. Cached responses are keyed by those counters, so
+invalidating is a single ``incr`` and old entries simply stop being read.
+Entries also expire after ``EVENT_CACHE_TIMEOUT`` seconds, which bounds how
+stale figures that do not bump a version (seat holds) can get.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.http import parse_etags
+from rest_framework.renderers import JSONRenderer
+
+CATALOGUE_VERSION_KEY = "events:catalogue:version"
+
+
+def _cache():
+    return caches[settings.EVENT_CACHE_ALIAS]
+
+
+def _event_version_key(event_id):
+    return f"events:event:{event_id}:version"
+
+
+def _get_version(key):
+    cache = _cache()
+    version = cache.get(key)
+    if version is None:
+        # Start from the clock rather than 1 so an evicted counter cannot
+        # come back at a value that old entries were stored under.
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump_event_version(event_id):
+    """Invalidate cached responses for ``event_id`` and the catalogue."""
+    cache = _cache()
+    for key in (CATALOGUE_VERSION_KEY, _event_version_key(event_id)):
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, time.time_ns(), timeout=None)
+
+
+def event_versions(event_ids):
+    """Current version of each event in ``event_ids``, keyed by id string (None if not set yet)."""
+    keys = {_event_version_key(event_id): str(event_id) for event_id in event_ids}
+    found = _cache().get_many(list(keys))
+    return {event_id: found.get(key) for key, event_id in keys.items()}
+
+
+def _request_digest(request):
+    raw = f"{request.scheme}://{request.get_host()}{request.get_full_path()}"
+    return hashlib.md5(raw.encode()).hexdigest()
+
+
+def catalogue_cache_key(request):
+    return f"events:list:{_get_version(CATALOGUE_VERSION_KEY)}:{_request_digest(request)}"
+
+
+def event_cache_key(request, event_id):
+    return f"events:detail:{event_id}:{_get_version(_event_version_key(event_id))}:{_request_digest(request)}"
+
+
+def cached_response(request, key, render):
+    """Serve ``key`` from the cache, calling ``render()`` on a miss.
+
+    ``render`` must return a DRF Response; only 200s are cached. Clients
+    sending a matching ``If-None-Match`` get a 304.
+    """
+    cache = _cache()
+    entry = cache.get(key)
+    if entry is None:
+        response = render()
+        if response.status_code != 200:
+            return response
+        content = JSONRenderer().render(response.data)
+        entry = (f'"{hashlib.md5(content).hexdigest()}"', content)
+        cache.set(key, entry, settings.EVENT_CACHE_TIMEOUT)
+
+    etag, content = entry
+    if_none_match = parse_etags(request.headers.get("If-None-Match", ""))
+    if etag in if_none_match or "*" in if_none_match:
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(content, content_type="application/json")
+    response["ETag"] = etag
+    response["Cache-Control"] = "public, no-cache"
+    return response
@@ -0,0 +1,171 @@
+"""Sales summary tables behind the per-event stats endpoint.
+
+``TicketTypeSales`` (one row per ticket type) and ``DailySales`` (one row
+per event per day) are adjusted with conditional ``F()`` UPDATEs in the
+same transaction as the ticket rows they describe, so a dashboard reads
+a handful of rows however many tickets an event has. Seats held by
+unpaid orders are already counted in ``TicketType.reserved``.
+
+``manage.py rebuild_sales`` recomputes the tables from the tickets, for
+backfills and after manual edits in the admin.
+"""
+from collections import Counter
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Case, Count, F, IntegerField, Q, Sum, Value, When
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import DailySales, Event, Ticket, TicketType, TicketTypeSales
+
+SOLD_STATUSES = ["paid", "checked_in"]
+
+
+def _money(value):
+    return str(Decimal(value).quantize(Decimal("0.01")))
+
+
+def _add(model, key, defaults, **deltas):
+    updates = {field: F(field) + delta for field, delta in deltas.items() if delta}
+    if not updates:
+        return
+    # Make sure the row exists (a no-op once it does, and concurrent
+    # creators cannot collide), then apply the deltas in place. Always the
+    # same two statements, so callers' query counts stay flat.
+    model.objects.bulk_create([model(**key, **defaults)], ignore_conflicts=True)
+    model.objects.filter(**key).update(**updates)
+
+
+def record_sale(ticket_type, quantity, ordered_at):
+    """Count ``quantity`` newly paid tickets of ``ticket_type`` ordered at ``ordered_at``."""
+    revenue = ticket_type.price * quantity
+    _add(TicketTypeSales, {"ticket_type_id": ticket_type.id}, {"event_id": ticket_type.event_id},
+         sold=quantity, revenue=revenue)
+    _add(DailySales, {"event_id": ticket_type.event_id, "day": timezone.localdate(ordered_at)}, {},
+         sold=quantity, revenue=revenue)
+
+
+def record_cancellation(ticket_type_id, event_id, quantity):
+    """Count ``quantity`` tickets of an order that was paid for but oversold."""
+    _add(TicketTypeSales, {"ticket_type_id": ticket_type_id}, {"event_id": event_id}, cancelled=quantity)
+
+
+def record_check_ins(tickets):
+    """Count check-ins of ``tickets``: dicts or objects with ticket_type_id and event_id."""
+    counts = Counter()
+    for ticket in tickets:
+        if isinstance(ticket, dict):
+            counts[(ticket["ticket_type_id"], ticket["event_id"])] += 1
+        else:
+            counts[(ticket.ticket_type_id, ticket.event_id)] += 1
+    if not counts:
+        return
+    # Tickets are checked in after they sell, so the rows normally exist:
+    # one UPDATE covers every ticket type in a gate batch.
+    updated = TicketTypeSales.objects.filter(ticket_type_id__in=[key[0] for key in counts]).update(
+        checked_in=F("checked_in") + Case(
+            *[When(ticket_type_id=ticket_type_id, then=Value(quantity)) for (ticket_type_id, _), quantity in counts.items()],
+            default=Value(0),
+            output_field=IntegerField(),
+        )
+    )
+    if updated < len(counts):
+        # Sold before the summary existed: build the missing rows from the
+        # tickets, whose statuses already include these check-ins.
+        existing = set(TicketTypeSales.objects.filter(ticket_type_id__in=[key[0] for key in counts])
+                       .values_list("ticket_type_id", flat=True))
+        missing = [ticket_type_id for ticket_type_id, _ in counts if ticket_type_id not in existing]
+        TicketTypeSales.objects.bulk_create(
+            [TicketTypeSales(**row) for row in _ticket_type_totals(Ticket.objects.filter(ticket_type_id__in=missing))],
+            ignore_conflicts=True,
+        )
+
+
+def ticket_type_figures(ticket_type):
+    """Dashboard figures for one ticket type fetched with ``select_related("sales")``."""
+    sales = getattr(ticket_type, "sales", None) or TicketTypeSales()
+    return {
+        "id": str(ticket_type.id),
+        "name": ticket_type.name,
+        "price": _money(ticket_type.price),
+        "limit": ticket_type.limit,
+        "pending": ticket_type.reserved,
+        "paid": sales.sold - sales.checked_in,
+        "checked_in": sales.checked_in,
+        "cancelled": sales.cancelled,
+        "sold": sales.sold,
+        "revenue": _money(sales.revenue),
+    }
+
+
+def event_stats(event):
+    """Dashboard figures for ``event``, from the summary tables.
+
+    Two queries: the ticket types with their sales rows, then the days. The
+    stats endpoint's event lookup makes three.
+    """
+    ticket_types = []
+    totals = Counter()
+    revenue = 0
+    for ticket_type in TicketType.objects.filter(event=event).select_related("sales").order_by("name"):
+        figures = ticket_type_figures(ticket_type)
+        ticket_types.append(figures)
+        totals.update({status: figures[status] for status in ["pending", "paid", "checked_in", "cancelled", "sold"]})
+        revenue += Decimal(figures["revenue"])
+    return {
+        "event": str(event.id),
+        "tickets": {status: totals[status] for status in ["pending", "paid", "checked_in", "cancelled"]},
+        "sold": totals["sold"],
+        "revenue": _money(revenue),
+        "check_in_rate": round(totals["checked_in"] / totals["sold"], 4) if totals["sold"] else None,
+        "ticket_types": ticket_types,
+        "sales_over_time": [
+            {"date": day.isoformat(), "sold": sold, "revenue": _money(day_revenue)}
+            for day, sold, day_revenue in DailySales.objects.filter(event=event)
+            .order_by("day")
+            .values_list("day", "sold", "revenue")
+        ],
+    }
+
+
+def _ticket_type_totals(tickets):
+    """``TicketTypeSales`` field values for the ticket types of ``tickets``, from their statuses."""
+    sold = Q(status__in=SOLD_STATUSES)
+    return (
+        tickets.values("ticket_type_id", "event_id")
+        .annotate(
+            sold=Count("id", filter=sold),
+            checked_in=Count("id", filter=Q(status="checked_in")),
+            cancelled=Count("id", filter=Q(status="cancelled")),
+            revenue=Sum("ticket_type__price", filter=sold, default=0),
+        )
+        .order_by()
+    )
+
+
+def rebuild_sales(event_ids=None):
+    """Recompute the summary tables from the tickets; returns the number of events rebuilt.
+
+    The events' ticket types are locked first, so payments settling
+    meanwhile wait and are counted on top of the rebuilt figures. Gate
+    check-ins do not touch ticket types; run it outside doors-open.
+    """
+    events = Event.objects.all() if event_ids is None else Event.objects.filter(id__in=event_ids)
+    event_ids = list(events.values_list("id", flat=True))
+    with transaction.atomic():
+        list(TicketType.objects.select_for_update().filter(event_id__in=event_ids).values_list("id", flat=True))
+        tickets = Ticket.objects.filter(event_id__in=event_ids)
+        per_type = _ticket_type_totals(tickets)
+        per_day = (
+            tickets.filter(status__in=SOLD_STATUSES)
+            .annotate(day=TruncDate("created_at"))
+            .values("event_id", "day")
+            .annotate(sold=Count("id"), revenue=Sum("ticket_type__price"))
+            .order_by()
+        )
+        TicketTypeSales.objects.filter(event_id__in=event_ids).delete()
+        DailySales.objects.filter(event_id__in=event_ids).delete()
+        TicketTypeSales.objects.bulk_create([TicketTypeSales(**row) for row in per_type], batch_size=500)
+        DailySales.objects.bulk_create([DailySales(**row) for row in per_day], batch_size=500)
+    return len(event_ids)
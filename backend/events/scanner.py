@@ -0,0 +1,151 @@
+"""Snapshots and deltas that let door scanners validate codes offline.
+
+Codes never leave the server in the clear. Each one is sent as
+``code_hash(event_id, code)``: the first 16 hex digits of
+``sha256("<event_id>:<code>")``. A scanner hashes what it reads the same way
+and looks the result up locally.
+
+The optional Bloom filter covers the same hashes. It has ``m`` bits and
+``k`` probes. Probe ``i`` is ``(h1 + i * h2) % m``, where ``h1`` and ``h2``
+are the two big-endian 64-bit halves of ``sha256(hash)``. Bits are packed
+LSB-first into bytes and base64 encoded.
+"""
+import base64
+import hashlib
+import math
+from datetime import timedelta, timezone as dt_timezone
+
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .checkins import check_in_tickets
+from .models import CheckIn, Ticket
+
+# Statuses scanners care about, and their one-letter wire form.
+STATUS_CODES = {"paid": "p", "checked_in": "c", "cancelled": "x"}
+
+# Commits can land slightly out of updated_at order, so deltas re-send a
+# short window before the watermark. Entries are idempotent.
+DELTA_OVERLAP = timedelta(seconds=5)
+
+BLOOM_FALSE_POSITIVE_RATE = 0.001
+
+
+def code_hash(event_id, code):
+    return hashlib.sha256(f"{event_id}:{code}".encode()).hexdigest()[:16]
+
+
+class BloomFilter:
+    def __init__(self, capacity, error_rate=BLOOM_FALSE_POSITIVE_RATE):
+        capacity = max(capacity, 1)
+        self.m = max(8, math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.k = max(1, round(self.m / capacity * math.log(2)))
+        self.bits = bytearray((self.m + 7) // 8)
+
+    def _positions(self, value):
+        digest = hashlib.sha256(value.encode()).digest()
+        h1 = int.from_bytes(digest[:8], "big")
+        h2 = int.from_bytes(digest[8:16], "big")
+        return ((h1 + i * h2) % self.m for i in range(self.k))
+
+    def add(self, value):
+        for position in self._positions(value):
+            self.bits[position // 8] |= 1 << (position % 8)
+
+    def __contains__(self, value):
+        return all(self.bits[p // 8] & (1 << (p % 8)) for p in self._positions(value))
+
+    def to_dict(self):
+        return {"m": self.m, "k": self.k, "bits": base64.b64encode(bytes(self.bits)).decode()}
+
+
+def parse_watermark(value):
+    """Return the datetime encoded in a ``since=`` value, or None if invalid."""
+    parsed = parse_datetime(value) if value else None
+    if parsed is not None and timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed, dt_timezone.utc)
+    return parsed
+
+
+def build_snapshot(event_id, since=None, bloom=False):
+    """Valid codes for ``event_id``, or only changes after ``since``.
+
+    A full snapshot lists paid and checked-in tickets. A delta also lists
+    tickets that were cancelled, so scanners can drop them.
+    """
+    queryset = Ticket.objects.filter(event_id=event_id, code__isnull=False)
+    if since is None:
+        queryset = queryset.filter(status__in=["paid", "checked_in"])
+    else:
+        queryset = queryset.filter(status__in=list(STATUS_CODES), updated_at__gt=since - DELTA_OVERLAP)
+
+    tickets = {}
+    watermark = since
+    for code, ticket_status, updated_at in queryset.values_list("code", "status", "updated_at").iterator(chunk_size=2000):
+        tickets[code_hash(event_id, code)] = STATUS_CODES[ticket_status]
+        if watermark is None or updated_at > watermark:
+            watermark = updated_at
+
+    snapshot = {
+        "event": str(event_id),
+        "delta": since is not None,
+        "version": (watermark or timezone.now()).isoformat(),
+        "tickets": tickets,
+    }
+    if bloom and since is None:
+        bloom_filter = BloomFilter(len(tickets))
+        for digest in tickets:
+            bloom_filter.add(digest)
+        snapshot["bloom"] = bloom_filter.to_dict()
+    return snapshot
+
+
+def _scan_result(scan, result, ticket=None, check_in=None):
+    item = {"code": scan["code"], "result": result}
+    if ticket is not None:
+        item["ticket"] = str(ticket["id"])
+    if check_in is not None:
+        item["checked_in_by"] = check_in.checked_in_by
+        item["checked_in_at"] = check_in.checked_in_at.isoformat()
+    return item
+
+
+def reconcile_scans(event_id, scans, checked_in_by):
+    """Apply scans recorded offline, in order, and report what happened to each.
+
+    Results: ``checked_in``; ``duplicate`` (this exact scan was already
+    synced); ``conflict`` (checked in by another scan, whose details are
+    returned); ``invalid`` (not paid or cancelled); ``not_found``.
+    """
+    outcomes = check_in_tickets(
+        [
+            {
+                "ticket": scan["code"],
+                "checked_in_by": scan.get("checked_in_by") or checked_in_by,
+                "checked_in_at": scan.get("scanned_at"),
+            }
+            for scan in scans
+        ],
+        event_id=event_id,
+    )
+
+    earlier_ids = [ticket["id"] for result, ticket, check_in in outcomes if result == "already_checked_in" and check_in is None]
+    earliest = {}
+    for check_in in CheckIn.objects.filter(ticket_id__in=earlier_ids).order_by("-checked_in_at"):
+        earliest[check_in.ticket_id] = check_in
+
+    results = []
+    for scan, (result, ticket, check_in) in zip(scans, outcomes):
+        if result == "already_checked_in":
+            check_in = check_in or earliest.get(ticket["id"])
+            scanned_by = scan.get("checked_in_by") or checked_in_by
+            if check_in is None:
+                result = "conflict"
+            elif check_in.checked_in_by == scanned_by and check_in.checked_in_at == scan.get("scanned_at"):
+                result = "duplicate"
+            else:
+                result = "conflict"
+        elif result in ["not_paid", "cancelled"]:
+            result = "invalid"
+        results.append(_scan_result(scan, result, ticket, check_in))
+    return results
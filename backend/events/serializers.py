@@ -1,33 +1,77 @@
 from django.conf import settings
+from django.utils.encoding import filepath_to_uri
 from rest_framework import serializers
 from .models import Event, TicketType, Attendee, Ticket, CheckIn
+from .images import VARIANT_FORMATS, srcset
+from .qr import qr_urls
 
 class TicketTypeSerializer(serializers.ModelSerializer):
     id = serializers.UUIDField(required=False)
     class Meta:
         model = TicketType
-        fields = ['id', 'name', 'price', 'limit', 'sold_count']
+        fields = ['id', 'name', 'price', 'limit', 'sold_count', 'reserved']
+        # Kept by conditional F() updates in events/reservations.py.
+        read_only_fields = ['sold_count', 'reserved']
+
+class MediaURLMixin:
+    def media_url(self, name):
+        if name.startswith('http://') or name.startswith('https://'):
+            return name
+        if not hasattr(self, '_media_base'):
+            request = self.context.get('request')
+            self._media_base = request.build_absolute_uri(settings.MEDIA_URL) if request else settings.MEDIA_URL
+        return f"{self._media_base}{filepath_to_uri(name.lstrip('/'))}"
+
+class MediaURLField(MediaURLMixin, serializers.ImageField):
+    """ImageField that renders URLs against a media base built once per serializer.
+
+    The stock field asks the storage and the request for a URL on every row.
+    """
+
+    def to_representation(self, value):
+        if not value:
+            return None
+        return self.media_url(value.name)
+
+class MediaSrcsetField(MediaURLMixin, serializers.Field):
+    """Read-only ``srcset`` strings, by format, for the resized copies of an image field.
+
+    None until ``manage.py process_images`` has processed the file currently
+    in the field; clients fall back to the full-size URL meanwhile.
+    """
+
+    def __init__(self, image_field, **kwargs):
+        self.image_field = image_field
+        kwargs['source'] = '*'
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, instance):
+        image = getattr(instance, self.image_field)
+        variants = getattr(instance, f"{self.image_field}_variants")
+        if not image or not variants or variants.get('source') != image.name or 'error' in variants:
+            return None
+        result = {'width': variants['width'], 'height': variants['height']}
+        for fmt in VARIANT_FORMATS:
+            result[fmt] = srcset(variants, fmt, self.media_url)
+        return result
 
 class EventSerializer(serializers.ModelSerializer):
     ticket_types = TicketTypeSerializer(many=True, required=False)
+    flyer = MediaURLField(required=False, allow_null=True, max_length=100)
+    flyer_srcset = MediaSrcsetField('flyer')
 
     class Meta:
         model = Event
-        fields = ['id', 'title', 'date_time', 'venue', 'description', 'flyer', 'status', 'ticket_types']
+        fields = ['id', 'title', 'date_time', 'starts_at', 'venue', 'description', 'flyer', 'flyer_srcset', 'status', 'admission_rate', 'ticket_types']
 
-    def to_representation(self, instance):
-        data = super().to_representation(instance)
-        flyer = data.get('flyer')
-        if flyer:
-            request = self.context.get('request')
-            if flyer.startswith('http://') or flyer.startswith('https://'):
-                return data
-            if flyer.startswith('/'):
-                data['flyer'] = request.build_absolute_uri(flyer) if request else flyer
-                return data
-            media_path = f"{settings.MEDIA_URL}{flyer.lstrip('/')}"
-            data['flyer'] = request.build_absolute_uri(media_path) if request else media_path
-        return data
+    def __init__(self, *args, **kwargs):
+        # Optional sparse fieldset, e.g. fields=['id', 'title'].
+        fields = kwargs.pop('fields', None)
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
 
     def create(self, validated_data):
         ticket_types_data = validated_data.pop('ticket_types', [])
@@ -54,9 +98,12 @@ class EventSerializer(serializers.ModelSerializer):
                 tt_id = tt_data.get('id')
                 if tt_id and tt_id in existing_ids:
                     tt_instance = TicketType.objects.get(id=tt_id)
-                    for attr, value in tt_data.items():
-                        setattr(tt_instance, attr, value)
-                    tt_instance.save()
+                    changed = [attr for attr in tt_data if attr != 'id']
+                    for attr in changed:
+                        setattr(tt_instance, attr, tt_data[attr])
+                    # Only the edited columns: a full save would write back
+                    # sold_count/reserved as read, undoing concurrent sales.
+                    tt_instance.save(update_fields=changed)
                     new_ids.append(tt_id)
                 else:
                     new_tt = TicketType.objects.create(event=instance, **tt_data)
@@ -68,13 +115,16 @@ class EventSerializer(serializers.ModelSerializer):
         return instance
 
 class AttendeeSerializer(serializers.ModelSerializer):
+    picture_srcset = MediaSrcsetField('picture')
+
     class Meta:
         model = Attendee
-        fields = ['id', 'full_name', 'email', 'age', 'phone', 'picture']
+        fields = ['id', 'full_name', 'email', 'age', 'phone', 'picture', 'picture_srcset']
 
 class TicketSerializer(serializers.ModelSerializer):
     attendee = AttendeeSerializer(read_only=True)
     ticket_type_name = serializers.CharField(source='ticket_type.name', read_only=True)
+    qr_images = serializers.SerializerMethodField()
     
     # Flattened attendee fields for input
     full_name = serializers.CharField(write_only=True)
@@ -87,7 +137,7 @@ class TicketSerializer(serializers.ModelSerializer):
         model = Ticket
         fields = [
             'id', 'event', 'ticket_type', 'ticket_type_name', 'attendee', 
-            'code', 'payment_ref', 'qr_value', 'status', 'created_at',
+            'code', 'payment_ref', 'qr_value', 'qr_images', 'status', 'created_at',
             'full_name', 'email', 'age', 'phone', 'picture'
         ]
         extra_kwargs = {
@@ -95,6 +145,9 @@ class TicketSerializer(serializers.ModelSerializer):
             'qr_value': {'required': False},
         }
 
+    def get_qr_images(self, obj):
+        return qr_urls(obj.qr_value, self.context.get("request"))
+
     def create(self, validated_data):
         full_name = validated_data.pop('full_name')
         email = validated_data.pop('email')
@@ -113,6 +166,18 @@ class TicketSerializer(serializers.ModelSerializer):
         return ticket
 
 
+class WalletTicketSerializer(serializers.ModelSerializer):
+    """A buyer's own ticket, as listed in their wallet."""
+    ticket_type_name = serializers.CharField(source='ticket_type.name', read_only=True)
+    qr_images = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Ticket
+        fields = ['id', 'ticket_type', 'ticket_type_name', 'code', 'qr_value', 'qr_images', 'status', 'created_at']
+
+    def get_qr_images(self, obj):
+        return qr_urls(obj.qr_value, self.context.get("request"))
+
 class TicketPurchaseSerializer(serializers.Serializer):
     event = serializers.UUIDField()
     ticket_type = serializers.UUIDField()
@@ -130,3 +195,19 @@ class CheckInSerializer(serializers.ModelSerializer):
     class Meta:
         model = CheckIn
         fields = ['id', 'ticket', 'attendee_name', 'ticket_code', 'checked_in_by', 'checked_in_at']
+        read_only_fields = ['checked_in_at']
+
+class OfflineScanSerializer(serializers.Serializer):
+    code = serializers.CharField()
+    scanned_at = serializers.DateTimeField(required=False)
+    checked_in_by = serializers.CharField(required=False)
+
+class ScanSyncSerializer(serializers.Serializer):
+    event = serializers.UUIDField()
+    checked_in_by = serializers.CharField(required=False)
+    scans = OfflineScanSerializer(many=True, max_length=1000)
+
+class CheckInBatchSerializer(serializers.Serializer):
+    event = serializers.UUIDField(required=False)
+    checked_in_by = serializers.CharField(max_length=255)
+    tickets = serializers.ListField(child=serializers.CharField(), allow_empty=False, max_length=1000)
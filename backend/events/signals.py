@@ -0,0 +1,17 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Event, TicketType
+from .response_cache import bump_event_version
+from .waiting_room import forget_admission_rate
+
+
+@receiver([post_save, post_delete], sender=Event)
+def invalidate_event(sender, instance, **kwargs):
+    bump_event_version(instance.pk)
+    forget_admission_rate(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=TicketType)
+def invalidate_ticket_type(sender, instance, **kwargs):
+    bump_event_version(instance.event_id)
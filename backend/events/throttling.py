@@ -0,0 +1,162 @@
+"""Token-bucket rate limits for the public purchase endpoints.
+
+Each bucket holds up to N tokens and refills at N per period, for a rate
+of "N/period" in THROTTLE_RATES. A request takes a token from each bucket
+it is counted against, in order, and is refused (429) at the first empty
+one. A request refused for its IP therefore never drains the buckets
+after it, and the body is only parsed once the IP has a token.
+
+- initialize-payment: ``purchase_ip`` (client IP), ``purchase_email``
+  (email within the event), ``purchase_event`` (all buyers of the event,
+  a ceiling that protects Paystack and the database).
+- verify-payment: ``verify_ip``. Every call makes a Paystack request, so
+  anonymous clients cannot use it to amplify load on us and the gateway.
+
+A scope without a rate is not limited. Buckets live in THROTTLE_STORE:
+``CacheBucketStore`` keeps them in THROTTLE_CACHE_ALIAS, shared by the
+workers when that cache is; it reads and writes without a lock, so
+concurrent requests can occasionally both take the last token.
+``LocalBucketStore`` keeps them in this process, which is the cheapest
+option when there is one worker. Either way a decision is a dict or cache
+lookup and a little arithmetic; the async views make it in a thread.
+"""
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.module_loading import import_string
+from rest_framework.throttling import BaseThrottle
+
+_DURATIONS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def parse_rate(rate):
+    """``"5/min"`` -> ``(5, 60)``; None for no limit."""
+    if not rate:
+        return None
+    count, period = rate.split("/")
+    return int(count), _DURATIONS[period[0]]
+
+
+class CacheBucketStore:
+    """Buckets in a Django cache."""
+
+    def __init__(self):
+        self.cache = caches[settings.THROTTLE_CACHE_ALIAS]
+
+    def get(self, key):
+        return self.cache.get(key)
+
+    def set(self, key, value, timeout):
+        self.cache.set(key, value, timeout)
+
+
+class LocalBucketStore:
+    """Buckets in this process's memory; expired ones are dropped as the dict grows."""
+
+    def __init__(self):
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        entry = self._buckets.get(key)
+        if entry is None or entry[1] < time.monotonic():
+            return None
+        return entry[0]
+
+    def set(self, key, value, timeout):
+        now = time.monotonic()
+        with self._lock:
+            if len(self._buckets) >= settings.THROTTLE_LOCAL_MAX_KEYS:
+                self._buckets = {k: entry for k, entry in self._buckets.items() if entry[1] >= now}
+            self._buckets[key] = (value, now + timeout)
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def store():
+    global _store
+    with _store_lock:
+        if _store is None or type(_store) is not import_string(settings.THROTTLE_STORE):
+            _store = import_string(settings.THROTTLE_STORE)()
+        return _store
+
+
+def take(scope, key):
+    """Take a token from ``scope``'s bucket for ``key``.
+
+    Returns None if there was one, else the seconds until there will be.
+    """
+    parsed = parse_rate(settings.THROTTLE_RATES.get(scope))
+    if parsed is None:
+        return None
+    capacity, period = parsed
+    refill = capacity / period
+    bucket_key = f"throttle:{scope}:{key}"
+    buckets = store()
+    now = time.time()
+    tokens, stamp = buckets.get(bucket_key) or (capacity, now)
+    tokens = min(capacity, tokens + (now - stamp) * refill)
+    if tokens < 1:
+        return (1 - tokens) / refill
+    # A bucket left alone for one period is full again, so it can expire.
+    buckets.set(bucket_key, (tokens - 1, now), period)
+    return None
+
+
+def _first_wait(buckets):
+    for scope, key in buckets:
+        if key:
+            wait = take(scope, key)
+            if wait is not None:
+                return wait
+    return None
+
+
+def purchase_wait(ident, data):
+    """Seconds a purchase from ``ident`` with body ``data`` must wait, or None.
+
+    ``data`` is a callable returning the parsed body, so a request refused
+    for its IP is never parsed.
+    """
+    wait = take("purchase_ip", ident)
+    if wait is not None:
+        return wait
+    body = data() or {}
+    event = str(body.get("event") or "")[:64]
+    email = str(body.get("email") or "").strip().lower()[:254]
+    return _first_wait([
+        ("purchase_email", event and email and f"{event}:{email}"),
+        ("purchase_event", event),
+    ])
+
+
+def verify_wait(ident):
+    return take("verify_ip", ident)
+
+
+class _TokenBucketThrottle(BaseThrottle):
+    def allow_request(self, request, view):
+        self._wait = self.bucket_wait(request)
+        return self._wait is None
+
+    def wait(self):
+        return self._wait
+
+
+class PurchaseThrottle(_TokenBucketThrottle):
+    def bucket_wait(self, request):
+        return purchase_wait(self.get_ident(request), lambda: request.data)
+
+
+class VerifyPaymentThrottle(_TokenBucketThrottle):
+    def bucket_wait(self, request):
+        return verify_wait(self.get_ident(request))
+
+
+def client_ident(request):
+    """The client address DRF throttles would use, for the async views."""
+    return BaseThrottle().get_ident(request)
@@ -1,6 +1,8 @@
-from django.urls import path, include
+from django.conf import settings
+from django.urls import path, include, re_path
 from rest_framework.routers import DefaultRouter
-from .views import EventViewSet, TicketViewSet, CheckInViewSet, AttendeeViewSet, paystack_webhook
+from . import async_views
+from .views import EventViewSet, TicketViewSet, CheckInViewSet, AttendeeViewSet, my_tickets, paystack_webhook, qr_image, waiting_room
 
 router = DefaultRouter()
 router.register(r'events', EventViewSet)
@@ -8,7 +10,20 @@ router.register(r'tickets', TicketViewSet)
 router.register(r'check-ins', CheckInViewSet)
 router.register(r'attendees', AttendeeViewSet)
 
-urlpatterns = [
+urlpatterns = []
+if settings.ASYNC_VIEWS:
+    # Under ASGI these take over the matching sync views and TicketViewSet actions.
+    urlpatterns += [
+        path('tickets/initialize-payment/', async_views.initialize_payment),
+        path('tickets/verify-payment/', async_views.verify_payment),
+        path('events/<uuid:event_id>/live/', async_views.event_live),
+        path('events/<uuid:event_id>/queue/', async_views.waiting_room),
+    ]
+
+urlpatterns += [
+    path('events/<uuid:event_id>/queue/', waiting_room),
+    path('me/tickets/', my_tickets),
     path('', include(router.urls)),
     path('payments/webhook/', paystack_webhook),
+    re_path(r'^qr/(?P<digest>[0-9a-f]{64})\.(?P<fmt>png|svg)$', qr_image),
 ]
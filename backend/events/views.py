@@ -2,19 +2,28 @@ import hashlib
 import hmac
 import json
 import uuid
-import requests
 import logging
+from datetime import timedelta
 from django.conf import settings
 from django.contrib.auth.models import User
+from django.core.handlers.asgi import ASGIRequest
+from django.core.signing import BadSignature
 from django.db import transaction
 from django.db.models import F
-from django.core.mail import send_mail
+from django.db.models.functions import Coalesce
+from django.http import HttpResponseNotModified, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from django.utils.http import parse_etags
+from django.views.decorators.http import require_safe
 from rest_framework import viewsets, status
 from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
 from rest_framework.decorators import action, api_view, permission_classes
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
-from rest_framework.permissions import AllowAny, IsAdminUser
+from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticated
 from twilio.rest import Client
+from core.media import media_response
 from .models import Event, TicketType, Attendee, Ticket, CheckIn
 from .serializers import (
     EventSerializer,
@@ -22,7 +31,27 @@ from .serializers import (
     CheckInSerializer,
     AttendeeSerializer,
     TicketPurchaseSerializer,
+    ScanSyncSerializer,
+    CheckInBatchSerializer,
 )
+from .attendees import holder_details, resolve_attendee
+from .checkins import check_in_tickets
+from .dates import parse_event_datetime
+from .exports import EXPORT_FORMATS, stream_export
+from .live import publish, publish_check_ins, stream_token
+from .notifications import queue_ticket_email
+from .pagination import EventCursorPagination
+from .paystack import initialize_transaction, verify_transaction
+from .qr import QR_FORMATS, qr_path, render_qr_codes
+from .response_cache import bump_event_version, cached_response, catalogue_cache_key, event_cache_key
+from .scanner import build_snapshot, parse_watermark, reconcile_scans
+from .throttling import PurchaseThrottle, VerifyPaymentThrottle
+from .waiting_room import EventNotFound, WaitingRoomUnavailable, check_admission
+from .waiting_room import join as waiting_room_join, status as waiting_room_status
+from .wallet import wallet, wallet_etag
+from .webhooks import record_delivery
+from .reservations import reserve_seats, confirm_seats, release_seats
+from .sales import event_stats, record_cancellation, record_check_ins, record_sale
 
 logger = logging.getLogger(__name__)
 
@@ -30,6 +59,67 @@ class EventViewSet(viewsets.ModelViewSet):
     queryset = Event.objects.all()
     serializer_class = EventSerializer
     parser_classes = [MultiPartParser, FormParser, JSONParser]
+    pagination_class = EventCursorPagination
+
+    def _requested_fields(self):
+        fields = self.request.query_params.get("fields")
+        if not fields or self.action not in ["list", "retrieve"]:
+            return None
+        return [name.strip() for name in fields.split(",") if name.strip()]
+
+    def _filter_dates(self, queryset):
+        # ?upcoming=true, ?from= and ?to= (ISO dates or datetimes; a bare
+        # `to` date includes that whole day). All are range scans on
+        # event_starts_at_idx; events without a parsed date never match.
+        params = self.request.query_params
+        if params.get("upcoming", "").lower() in ["1", "true"]:
+            queryset = queryset.filter(starts_at__gte=timezone.now())
+        for param in ["from", "to"]:
+            value = params.get(param)
+            if not value:
+                continue
+            bound = parse_event_datetime(value)
+            if bound is None:
+                raise ValidationError({param: "Enter a date or datetime, e.g. 2026-02-14 or 2026-02-14T17:30."})
+            if param == "from":
+                queryset = queryset.filter(starts_at__gte=bound)
+            elif parse_date(value) is not None:
+                queryset = queryset.filter(starts_at__lt=bound + timedelta(days=1))
+            else:
+                queryset = queryset.filter(starts_at__lte=bound)
+        return queryset
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == "list":
+            queryset = self._filter_dates(queryset).order_by(F("starts_at").asc(nulls_last=True), "id")
+        if self.action in ["list", "retrieve"]:
+            fields = self._requested_fields()
+            if fields is None or "ticket_types" in fields:
+                queryset = queryset.prefetch_related("ticket_types")
+        return queryset
+
+    def get_serializer(self, *args, **kwargs):
+        kwargs.setdefault("fields", self._requested_fields())
+        return super().get_serializer(*args, **kwargs)
+
+    def list(self, request, *args, **kwargs):
+        if request.user.is_authenticated:
+            return super().list(request, *args, **kwargs)
+        return cached_response(
+            request,
+            catalogue_cache_key(request),
+            lambda: super(EventViewSet, self).list(request, *args, **kwargs),
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        if request.user.is_authenticated:
+            return super().retrieve(request, *args, **kwargs)
+        return cached_response(
+            request,
+            event_cache_key(request, kwargs["pk"]),
+            lambda: super(EventViewSet, self).retrieve(request, *args, **kwargs),
+        )
 
     def _coerce_ticket_types(self, data):
         ticket_types = data.get("ticket_types")
@@ -80,6 +170,31 @@ class EventViewSet(viewsets.ModelViewSet):
             return [AllowAny()]
         return [IsAdminUser()]
 
+    @action(detail=True, methods=["get"])
+    def export(self, request, pk=None):
+        event = self.get_object()
+        export_format = request.query_params.get("type", "csv")
+        if export_format not in EXPORT_FORMATS:
+            return Response({"error": "type must be csv or ndjson"}, status=status.HTTP_400_BAD_REQUEST)
+        response = StreamingHttpResponse(
+            stream_export(event.id, export_format, asynchronous=isinstance(request._request, ASGIRequest)),
+            content_type=EXPORT_FORMATS[export_format],
+        )
+        response["Content-Disposition"] = f'attachment; filename="event-{event.id}-tickets.{export_format}"'
+        return response
+
+    @action(detail=True, methods=["get"])
+    def stats(self, request, pk=None):
+        return Response(event_stats(self.get_object()))
+
+    @action(detail=True, methods=["post"], url_path="live-token")
+    def live_token(self, request, pk=None):
+        event = self.get_object()
+        return Response({
+            "token": stream_token(request.user, event.id),
+            "expires_in": settings.LIVE_TOKEN_MAX_AGE,
+        })
+
 class TicketViewSet(viewsets.ModelViewSet):
     queryset = Ticket.objects.all()
     serializer_class = TicketSerializer
@@ -94,7 +209,7 @@ class TicketViewSet(viewsets.ModelViewSet):
         return [IsAdminUser()]
 
     def get_queryset(self):
-        queryset = Ticket.objects.all().order_by("-created_at")
+        queryset = Ticket.objects.select_related("attendee", "ticket_type").order_by("-created_at")
         event_id = self.request.query_params.get("event")
         if event_id:
             queryset = queryset.filter(event_id=event_id)
@@ -103,8 +218,11 @@ class TicketViewSet(viewsets.ModelViewSet):
             queryset = queryset.filter(status=status_filter)
         return queryset
 
-    @action(detail=False, methods=['post'], url_path="initialize-payment")
+    @action(detail=False, methods=['post'], url_path="initialize-payment", throttle_classes=[PurchaseThrottle])
     def initialize_payment(self, request):
+        refused = check_admission(request.data.get("event"), request.headers.get("X-Admission-Token"))
+        if refused:
+            return Response({"error": refused}, status=status.HTTP_403_FORBIDDEN)
         serializer = TicketPurchaseSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         data = serializer.validated_data
@@ -119,7 +237,9 @@ class TicketViewSet(viewsets.ModelViewSet):
         except TicketType.DoesNotExist:
             return Response({"error": "Ticket type not found"}, status=status.HTTP_404_NOT_FOUND)
 
-        if ticket_type.sold_count + data.get("quantity", 1) > ticket_type.limit:
+        payment_ref = f"PSK-{uuid.uuid4().hex[:12].upper()}"
+        quantity = data.get("quantity", 1)
+        if not reserve_seats(ticket_type.id, quantity, payment_ref):
             return Response({"error": "Not enough tickets available"}, status=status.HTTP_400_BAD_REQUEST)
 
         # Handle User creation/linking for the login feature
@@ -132,17 +252,8 @@ class TicketViewSet(viewsets.ModelViewSet):
             }
         )
 
-        attendee = Attendee.objects.create(
-            user=user,
-            full_name=data["full_name"],
-            email=data["email"],
-            age=data["age"],
-            phone=data["phone"],
-            picture=data.get("picture"),
-        )
+        attendee, _ = resolve_attendee(user, data, signed_in=request.user.pk == user.pk)
 
-        payment_ref = f"PSK-{uuid.uuid4().hex[:12].upper()}"
-        quantity = data.get("quantity", 1)
         tickets = []
         for _ in range(quantity):
             tickets.append(Ticket(
@@ -151,6 +262,7 @@ class TicketViewSet(viewsets.ModelViewSet):
                 attendee=attendee,
                 status="pending",
                 payment_ref=payment_ref,
+                **holder_details(data),
             ))
         Ticket.objects.bulk_create(tickets)
 
@@ -160,14 +272,16 @@ class TicketViewSet(viewsets.ModelViewSet):
             return Response({"status": "paid", "tickets": TicketSerializer(saved_tickets, many=True).data})
 
         total_amount = float(ticket_type.price) * quantity
-        paystack = _initialize_paystack_payment(
+        paystack = initialize_transaction(
             email=data["email"],
             amount=total_amount,
             reference=payment_ref,
         )
         if not paystack["ok"]:
             Ticket.objects.filter(payment_ref=payment_ref).delete()
-            attendee.delete()
+            # A returning buyer's attendee keeps their other tickets.
+            Attendee.objects.filter(id=attendee.id, tickets__isnull=True).delete()
+            release_seats(payment_ref)
             return Response({"error": "Payment initialization failed"}, status=status.HTTP_502_BAD_GATEWAY)
 
         return Response({
@@ -176,19 +290,19 @@ class TicketViewSet(viewsets.ModelViewSet):
             "reference": payment_ref,
         })
 
-    @action(detail=False, methods=['post'], url_path="verify-payment")
+    @action(detail=False, methods=['post'], url_path="verify-payment", throttle_classes=[VerifyPaymentThrottle])
     def verify_payment(self, request):
         reference = request.data.get("reference")
         if not reference:
             return Response({"error": "reference is required"}, status=status.HTTP_400_BAD_REQUEST)
 
-        verified = _verify_paystack_payment(reference)
+        verified = verify_transaction(reference)
+        if verified.get("unavailable"):
+            return Response({"error": "Payment provider unavailable, try again shortly"}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
         if not verified["ok"]:
             return Response({"error": "Payment verification failed"}, status=status.HTTP_400_BAD_REQUEST)
 
-        try:
-            ticket = Ticket.objects.get(payment_ref=reference)
-        except Ticket.DoesNotExist:
+        if not Ticket.objects.filter(payment_ref=reference).exists():
             return Response({"error": "Ticket not found"}, status=status.HTTP_404_NOT_FOUND)
 
         _finalize_ticket_payment(reference, notify=True)
@@ -201,9 +315,12 @@ class TicketViewSet(viewsets.ModelViewSet):
         event_id = request.query_params.get('eventId')
         if not code or not event_id:
             return Response({'error': 'Code and eventId are required'}, status=status.HTTP_400_BAD_REQUEST)
-        
+
+        if request.query_params.get('mode') == 'lean':
+            return self._verify_lean(code, event_id)
+
         try:
-            ticket = Ticket.objects.get(code=code, event_id=event_id)
+            ticket = Ticket.objects.select_related('attendee', 'ticket_type').get(code=code, event_id=event_id)
             if ticket.status == "pending":
                 return Response({'error': 'Ticket not paid'}, status=status.HTTP_400_BAD_REQUEST)
             if ticket.status == "cancelled":
@@ -213,12 +330,47 @@ class TicketViewSet(viewsets.ModelViewSet):
         except Ticket.DoesNotExist:
             return Response({'error': 'Ticket not found'}, status=status.HTTP_404_NOT_FOUND)
 
+    def _verify_lean(self, code, event_id):
+        # Gate scanners only need to know whether to let someone in: one
+        # joined query over the (event, code) index, no model instances.
+        ticket = (
+            Ticket.objects.filter(code=code, event_id=event_id)
+            .values('id', 'code', 'status', ticket_type_name=F('ticket_type__name'), attendee_name=F('attendee__full_name'))
+            .first()
+        )
+        if ticket is None:
+            return Response({'error': 'Ticket not found'}, status=status.HTTP_404_NOT_FOUND)
+        if ticket['status'] == "pending":
+            return Response({'error': 'Ticket not paid'}, status=status.HTTP_400_BAD_REQUEST)
+        if ticket['status'] == "cancelled":
+            return Response({'error': 'Ticket cancelled'}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(ticket)
+
+    @action(detail=False, methods=["get"], url_path="scanner-snapshot")
+    def scanner_snapshot(self, request):
+        event_id = request.query_params.get("event")
+        if not event_id:
+            return Response({"error": "event is required"}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            event_id = uuid.UUID(event_id)
+        except ValueError:
+            return Response({"error": "Invalid event"}, status=status.HTTP_400_BAD_REQUEST)
+
+        since = None
+        if request.query_params.get("since"):
+            since = parse_watermark(request.query_params["since"])
+            if since is None:
+                return Response({"error": "Invalid since"}, status=status.HTTP_400_BAD_REQUEST)
+
+        bloom = request.query_params.get("bloom", "").lower() in ["1", "true"]
+        return Response(build_snapshot(event_id, since=since, bloom=bloom))
+
     @action(detail=True, methods=["post"], url_path="resend-code")
     def resend_code(self, request, pk=None):
         ticket = self.get_object()
         if ticket.status != "paid" or not ticket.code:
             return Response({"error": "Ticket not paid or code missing"}, status=status.HTTP_400_BAD_REQUEST)
-        _send_ticket_email(ticket)
+        queue_ticket_email(Ticket.objects.filter(pk=ticket.pk))
         return Response({"status": "queued"})
 
 class CheckInViewSet(viewsets.ModelViewSet):
@@ -244,13 +396,52 @@ class CheckInViewSet(viewsets.ModelViewSet):
 
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        serializer.save()
-
-        ticket.status = "checked_in"
-        ticket.save(update_fields=["status"])
+        with transaction.atomic():
+            checked_in = Ticket.objects.filter(pk=ticket.pk, status="paid").update(
+                status="checked_in", updated_at=timezone.now()
+            )
+            if not checked_in:
+                # Another gate got there between the read above and now.
+                return Response({"error": "Already checked in"}, status=status.HTTP_400_BAD_REQUEST)
+            serializer.save()
+            record_check_ins([ticket])
+            publish_check_ins([{"event_id": ticket.event_id, "ticket_type_id": ticket.ticket_type_id, "code": ticket.code}])
 
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
+    @action(detail=False, methods=["post"])
+    def batch(self, request):
+        serializer = CheckInBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        outcomes = check_in_tickets(
+            [{"ticket": key, "checked_in_by": data["checked_in_by"]} for key in data["tickets"]],
+            event_id=data.get("event"),
+        )
+        results = []
+        for key, (result, ticket, check_in) in zip(data["tickets"], outcomes):
+            item = {"ticket": key, "result": result}
+            if ticket is not None:
+                item["id"] = str(ticket["id"])
+                item["code"] = ticket["code"]
+            results.append(item)
+        return Response({
+            "checked_in": sum(1 for result, _, _ in outcomes if result == "checked_in"),
+            "results": results,
+        })
+
+    @action(detail=False, methods=["post"])
+    def sync(self, request):
+        serializer = ScanSyncSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        results = reconcile_scans(
+            data["event"],
+            data["scans"],
+            data.get("checked_in_by") or request.user.get_username(),
+        )
+        return Response({"results": results})
+
 class AttendeeViewSet(viewsets.ModelViewSet):
     queryset = Attendee.objects.all()
     serializer_class = AttendeeSerializer
@@ -259,87 +450,94 @@ class AttendeeViewSet(viewsets.ModelViewSet):
         return [IsAdminUser()]
 
 
-def _initialize_paystack_payment(email, amount, reference):
-    if not settings.PAYSTACK_SECRET_KEY:
-        return {"ok": False}
-    headers = {
-        "Authorization": f"Bearer {settings.PAYSTACK_SECRET_KEY}",
-        "Content-Type": "application/json",
-    }
-    payload = {
-        "email": email,
-        "amount": int(amount * 100),
-        "reference": reference,
-    }
-    if settings.PAYSTACK_CALLBACK_URL:
-        payload["callback_url"] = settings.PAYSTACK_CALLBACK_URL
-    response = requests.post("https://api.paystack.co/transaction/initialize", headers=headers, json=payload, timeout=20)
-    if response.status_code != 200:
-        return {"ok": False}
-    data = response.json()
-    if not data.get("status"):
-        return {"ok": False}
-    return {"ok": True, "authorization_url": data["data"]["authorization_url"]}
-
-
-def _verify_paystack_payment(reference):
-    if not settings.PAYSTACK_SECRET_KEY:
-        return {"ok": False}
-    headers = {"Authorization": f"Bearer {settings.PAYSTACK_SECRET_KEY}"}
-    response = requests.get(f"https://api.paystack.co/transaction/verify/{reference}", headers=headers, timeout=20)
-    if response.status_code != 200:
-        return {"ok": False}
-    data = response.json()
-    if not data.get("status") or data.get("data", {}).get("status") != "success":
-        return {"ok": False}
-    return {"ok": True, "payload": data["data"]}
-
-
 def _finalize_ticket_payment(reference, notify=False):
+    # Repeat verifications and webhooks for a settled order stop here,
+    # before taking any row locks. An oversold order is settled too.
+    settled = ["paid", "checked_in", "cancelled"]
+    if not Ticket.objects.filter(payment_ref=reference).exclude(status__in=settled).exists():
+        return
+
     with transaction.atomic():
-        tickets = Ticket.objects.select_for_update().filter(payment_ref=reference)
-        if not tickets.exists() or tickets[0].status == "paid":
+        tickets = list(Ticket.objects.select_for_update().filter(payment_ref=reference))
+        if not tickets or tickets[0].status in settled:
             return
-            
-        ticket_type = TicketType.objects.select_for_update().get(id=tickets[0].ticket_type_id)
-        quantity = tickets.count()
-        
-        if ticket_type.sold_count + quantity > ticket_type.limit:
-            for ticket in tickets:
-                ticket.status = "cancelled"
-                ticket.save()
-            return
-            
+
         for ticket in tickets:
             ticket.status = "paid"
-            ticket.save()
-            
-        ticket_type.sold_count = F("sold_count") + quantity
-        ticket_type.save(update_fields=["sold_count"])
-    
-    if notify:
-        _send_ticket_email(tickets)
-
-
-def _send_ticket_email(tickets):
-    if not settings.EMAIL_HOST_USER:
-        return None
-    
-    main_ticket = tickets.first()
-    if not main_ticket:
-        return None
-        
-    codes = ", ".join([t.code for t in tickets if t.code])
-    
-    subject = f"Your Tickets for {main_ticket.event.title}"
-    message = f"Hello {main_ticket.attendee.full_name},\n\nYour tickets for {main_ticket.event.title} have been confirmed!\n\nTicket Codes: {codes}\nVenue: {main_ticket.event.venue}\nDate: {main_ticket.event.date_time}\n\nShow these codes or the QR codes at the entrance.\n\nEnjoy the event!"
-    recipient_list = [main_ticket.attendee.email]
-    
+            ticket.assign_code()
+        # Only the codes differ per ticket; bulk_update cost grows with
+        # rows x fields, so everything shared goes in a plain UPDATE.
+        Ticket.objects.bulk_update(tickets, ["code"])
+        Ticket.objects.filter(payment_ref=reference).update(
+            status="paid", qr_value=Coalesce("qr_value", "code"), updated_at=timezone.now()
+        )
+
+        ticket_type = TicketType.objects.only("price", "event_id").get(id=tickets[0].ticket_type_id)
+        with transaction.atomic():
+            record_sale(ticket_type, len(tickets), tickets[0].created_at)
+            publish(tickets[0].event_id, ticket_type.id,
+                    {"type": "sale", "reference": reference, "quantity": len(tickets)})
+            # The email goes in the outbox in the same transaction as the
+            # sale: once the order reads as paid, retries stop, so it
+            # cannot be lost.
+            if notify:
+                queue_ticket_email(Ticket.objects.filter(payment_ref=reference))
+            # Seats are claimed last so the TicketType row is only
+            # write-locked for the commit that follows. If they are gone,
+            # the sale above is rolled back to the savepoint.
+            sold = confirm_seats(reference, ticket_type.id, len(tickets))
+            if not sold:
+                transaction.set_rollback(True)
+
+        if not sold:
+            Ticket.objects.filter(payment_ref=reference).update(
+                status="cancelled", code=None, qr_value=None, updated_at=timezone.now()
+            )
+            record_cancellation(ticket_type.id, tickets[0].event_id, len(tickets))
+            publish(tickets[0].event_id, ticket_type.id,
+                    {"type": "cancelled", "reference": reference, "quantity": len(tickets)})
+            return
+
+    bump_event_version(tickets[0].event_id)
+
     try:
-        return send_mail(subject, message, settings.DEFAULT_FROM_EMAIL, recipient_list)
+        render_qr_codes(Ticket.objects.filter(payment_ref=reference).values_list("qr_value", flat=True))
     except Exception as e:
-        print(f"Email sending failed: {e}")
-        return None
+        # The images are rendered again on demand when the email goes out.
+        logger.warning("QR rendering for %s failed: %s", reference, e)
+
+
+@api_view(["GET", "POST"])
+@permission_classes([AllowAny])
+def waiting_room(request, event_id):
+    """POST joins the event's waiting room; GET ?token=<queue_token> checks your turn."""
+    try:
+        if request.method == "POST":
+            return Response(waiting_room_join(event_id))
+        token = request.query_params.get("token")
+        if not token:
+            return Response({"error": "token is required"}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(waiting_room_status(event_id, token))
+    except EventNotFound:
+        return Response({"error": "Event not found"}, status=status.HTTP_404_NOT_FOUND)
+    except BadSignature:
+        return Response({"error": "Queue token is invalid or has expired"}, status=status.HTTP_400_BAD_REQUEST)
+    except WaitingRoomUnavailable:
+        return Response({"error": "Waiting room unavailable, try again shortly"}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def my_tickets(request):
+    """The signed-in user's tickets grouped by event. Poll with If-None-Match for a 304."""
+    etag = wallet_etag(request.user)
+    if etag in parse_etags(request.headers.get("If-None-Match", "")):
+        response = HttpResponseNotModified()
+    else:
+        response = Response(wallet(request.user, request))
+    response["ETag"] = etag
+    response["Cache-Control"] = "private, no-cache"
+    return response
 
 
 @api_view(["POST"])
@@ -353,9 +551,17 @@ def paystack_webhook(request):
     if not hmac.compare_digest(computed, signature):
         return Response({"error": "Invalid signature"}, status=status.HTTP_400_BAD_REQUEST)
 
-    payload = json.loads(request.body.decode("utf-8"))
-    if payload.get("event") == "charge.success":
-        reference = payload.get("data", {}).get("reference")
-        if reference:
-            _finalize_ticket_payment(reference, notify=True)
+    try:
+        payload = json.loads(request.body.decode("utf-8"))
+    except ValueError:
+        return Response({"error": "Invalid payload"}, status=status.HTTP_400_BAD_REQUEST)
+    # Acknowledge straight away; `manage.py process_webhooks` settles the
+    # payment, so Paystack never waits on (and retries because of) it.
+    record_delivery(payload, request.body)
     return Response({"status": "ok"})
+
+
+@require_safe
+def qr_image(request, digest, fmt):
+    """Serve a stored QR image. Its address is its content hash, so it never changes."""
+    return media_response(request, qr_path(digest, fmt), content_type=QR_FORMATS[fmt], etag=f'"{digest}"')
@@ -0,0 +1,211 @@
+"""Waiting room in front of the purchase endpoints for busy on-sales.
+
+An event with ``admission_rate`` set (buyers per minute) has a waiting
+room. A buyer joins with ``POST /api/events/<id>/queue/`` and gets a place
+in line and a signed queue token. Polling ``GET .../queue/?token=`` reports
+the estimated wait and, when their turn comes, a signed admission token.
+initialize_payment wants that token in the ``X-Admission-Token`` header
+for the next WAITING_ROOM_ADMISSION_SECONDS.
+
+Places come from a counter in the cache, and turns from the clock: place
+``p`` is admitted once ``WAITING_ROOM_BURST + rate * minutes since the
+first buyer joined`` reaches it. Nothing is stored per buyer, and checking
+either token is a signature check (the rate itself is cached), so a crowd
+of buyers refreshing never reaches the database. The counter needs a cache
+shared by the web workers with an atomic incr (Redis or Memcached, or the
+waiting_room LocMemCache with a single worker). FileBasedCache's incr is not
+atomic: places get handed out twice and buyers come in faster than the
+rate. The cache must not evict the counter either. If it goes missing
+while the line is open, joining raises WaitingRoomUnavailable instead of
+numbering places from 1 again, which would let the next
+WAITING_ROOM_BURST buyers straight in.
+
+Under ASGI the async variants (``ajoin``, ``astatus``, ``acheck_admission``)
+serve the queue and the purchase check. A sync view there gets a thread
+of its own per request, so thousands of polling buyers would mean
+thousands of threads competing with the purchases in progress; the async
+views stay on the event loop and send only their cache calls to the
+default executor.
+"""
+import logging
+import math
+import time
+import uuid
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core import signing
+from django.core.cache import caches
+
+from .models import Event
+
+logger = logging.getLogger(__name__)
+
+_QUEUE_SALT = "events.waiting_room.queue"
+_ADMISSION_SALT = "events.waiting_room.admission"
+
+# Cached in place of a rate for events without a waiting room.
+_NO_WAITING_ROOM = 0
+
+
+class EventNotFound(Exception):
+    pass
+
+
+class WaitingRoomUnavailable(Exception):
+    pass
+
+
+def _cache():
+    return caches[settings.WAITING_ROOM_CACHE_ALIAS]
+
+
+def _off_thread(fn):
+    return sync_to_async(fn, thread_sensitive=False)
+
+
+def _rate_key(event_id):
+    return f"waiting-room:{event_id}:rate"
+
+
+def _event_rate(event_id, found):
+    if not found:
+        raise EventNotFound(event_id)
+    rate = found[0] or _NO_WAITING_ROOM
+    _cache().set(_rate_key(event_id), rate, settings.WAITING_ROOM_RATE_CACHE_SECONDS)
+    return rate
+
+
+def _rate_query(event_id):
+    return Event.objects.filter(id=event_id).values_list("admission_rate", flat=True)[:1]
+
+
+def admission_rate(event_id):
+    """Buyers per minute for ``event_id``, or None without a waiting room.
+
+    Cached for WAITING_ROOM_RATE_CACHE_SECONDS; saving the event clears it.
+    Raises EventNotFound for an unknown event.
+    """
+    rate = _cache().get(_rate_key(event_id))
+    if rate is None:
+        rate = _event_rate(event_id, list(_rate_query(event_id)))
+    return rate or None
+
+
+async def aadmission_rate(event_id):
+    rate = await _off_thread(_cache().get)(_rate_key(event_id))
+    if rate is None:
+        found = [rate async for rate in _rate_query(event_id)]
+        rate = await _off_thread(_event_rate)(event_id, found)
+    return rate or None
+
+
+def forget_admission_rate(event_id):
+    _cache().delete(_rate_key(event_id))
+
+
+def _admission(event_id, place):
+    return {
+        "admitted": True,
+        "admission_token": signing.dumps({"e": str(event_id), "p": place}, salt=_ADMISSION_SALT),
+        "expires_in": settings.WAITING_ROOM_ADMISSION_SECONDS,
+    }
+
+
+def _turn(event_id, rate, place, opened_at):
+    if rate is None:
+        return {"place": place, **_admission(event_id, place)}
+    admitted = settings.WAITING_ROOM_BURST + math.floor(rate * (time.time() - opened_at) / 60)
+    if place <= admitted:
+        return {"place": place, **_admission(event_id, place)}
+    wait = math.ceil((place - admitted) * 60 / rate)
+    return {
+        "place": place,
+        "admitted": False,
+        "ahead": place - admitted - 1,
+        "wait_seconds": wait,
+        "poll_after": min(wait, settings.WAITING_ROOM_POLL_SECONDS),
+    }
+
+
+def _take_place(event_id, rate):
+    if rate is None:
+        return _admission(event_id, 0)
+    cache = _cache()
+    timeout = settings.WAITING_ROOM_STATE_SECONDS
+    # The line opens when the first buyer joins, and only then does its
+    # counter start at 0.
+    if cache.add(f"waiting-room:{event_id}:opened", time.time(), timeout):
+        cache.add(f"waiting-room:{event_id}:places", 0, timeout)
+    opened_at = cache.get(f"waiting-room:{event_id}:opened")
+    try:
+        place = cache.incr(f"waiting-room:{event_id}:places")
+    except ValueError:
+        logger.error("Waiting room counter for event %s is gone; refusing new places", event_id)
+        raise WaitingRoomUnavailable(event_id) from None
+    token = signing.dumps({"e": str(event_id), "p": place, "o": opened_at}, salt=_QUEUE_SALT)
+    return {"queue_token": token, **_turn(event_id, rate, place, opened_at)}
+
+
+def join(event_id):
+    """Take the next place in ``event_id``'s line; returns the buyer's status."""
+    return _take_place(event_id, admission_rate(event_id))
+
+
+async def ajoin(event_id):
+    return await _off_thread(_take_place)(event_id, await aadmission_rate(event_id))
+
+
+def _queue_place(event_id, queue_token):
+    data = signing.loads(queue_token, salt=_QUEUE_SALT, max_age=settings.WAITING_ROOM_STATE_SECONDS)
+    if data["e"] != str(event_id):
+        raise signing.BadSignature("Queue token is for another event")
+    return data["p"], data["o"]
+
+
+def status(event_id, queue_token):
+    """Status of the buyer holding ``queue_token``; raises BadSignature for a bad token."""
+    place, opened_at = _queue_place(event_id, queue_token)
+    return _turn(event_id, admission_rate(event_id), place, opened_at)
+
+
+async def astatus(event_id, queue_token):
+    place, opened_at = _queue_place(event_id, queue_token)
+    return _turn(event_id, await aadmission_rate(event_id), place, opened_at)
+
+
+def _refusal(event_id, rate, admission_token):
+    if rate is None:
+        return None
+    if not admission_token:
+        return "Join the waiting room for this event first"
+    try:
+        data = signing.loads(admission_token, salt=_ADMISSION_SALT, max_age=settings.WAITING_ROOM_ADMISSION_SECONDS)
+    except signing.BadSignature:
+        return "Admission has expired or is invalid; join the waiting room again"
+    if data["e"] != str(event_id):
+        return "Admission is for another event"
+    return None
+
+
+def check_admission(event_id, admission_token):
+    """Why a purchase for ``event_id`` may not go ahead, or None if it may.
+
+    Costs no query once the event's rate is cached. A malformed or unknown
+    event is let through for the purchase endpoint to reject.
+    """
+    try:
+        event_id = uuid.UUID(str(event_id))
+        rate = admission_rate(event_id)
+    except (ValueError, EventNotFound):
+        return None
+    return _refusal(event_id, rate, admission_token)
+
+
+async def acheck_admission(event_id, admission_token):
+    try:
+        event_id = uuid.UUID(str(event_id))
+        rate = await aadmission_rate(event_id)
+    except (ValueError, EventNotFound):
+        return None
+    return _refusal(event_id, rate, admission_token)
@@ -0,0 +1,62 @@
+"""The signed-in buyer's tickets, grouped by event, for the ticket wallet.
+
+The wallet is polled, so its ETag is worked out without building it: one
+aggregate over the buyer's tickets (how many per event, and when one last
+changed; every write to a ticket sets ``updated_at``) plus the events'
+response cache versions, which move whenever an event or its ticket types
+are edited. A poll that still matches costs that query and a cache read.
+"""
+import hashlib
+
+from django.db.models import Count, F, Max
+
+from .models import Ticket
+from .response_cache import event_versions
+from .serializers import EventSerializer, WalletTicketSerializer
+
+# Unpaid checkouts are not tickets yet.
+WALLET_STATUSES = ["paid", "checked_in", "cancelled"]
+
+EVENT_FIELDS = ["id", "title", "date_time", "starts_at", "venue", "flyer", "flyer_srcset", "status"]
+
+
+def _tickets(user):
+    return Ticket.objects.filter(attendee__user=user, status__in=WALLET_STATUSES)
+
+
+def wallet_etag(user):
+    rows = list(
+        _tickets(user).values("event_id")
+        .annotate(count=Count("id"), changed=Max("updated_at"))
+        .order_by("event_id")
+        .values_list("event_id", "count", "changed")
+    )
+    versions = event_versions(event_id for event_id, _, _ in rows)
+    # The user is part of it: two buyers' wallets can otherwise hash the
+    # same (both empty, say), and a shared cache must not mix them up.
+    raw = repr((user.pk, [
+        (str(event_id), count, changed.isoformat(), versions[str(event_id)]) for event_id, count, changed in rows
+    ]))
+    return f'"{hashlib.md5(raw.encode()).hexdigest()}"'
+
+
+def wallet(user, request):
+    """``user``'s tickets as ``{"events": [{"event": ..., "tickets": [...]}]}``, soonest event first, in one query."""
+    groups = {}
+    for ticket in (
+        _tickets(user).select_related("event", "ticket_type")
+        .order_by(F("event__starts_at").asc(nulls_last=True), "event_id", "created_at")
+    ):
+        if ticket.event_id not in groups:
+            groups[ticket.event_id] = (ticket.event, [])
+        groups[ticket.event_id][1].append(ticket)
+    context = {"request": request}
+    return {
+        "events": [
+            {
+                "event": EventSerializer(event, fields=EVENT_FIELDS, context=context).data,
+                "tickets": WalletTicketSerializer(tickets, many=True, context=context).data,
+            }
+            for event, tickets in groups.values()
+        ]
+    }
@@ -0,0 +1,108 @@
+"""Inbox for Paystack webhooks.
+
+The webhook view only records a delivery and returns; ``manage.py
+process_webhooks`` acts on it later. Paystack redelivers on timeouts, so a
+delivery's ``event_key`` is unique and a repeat is dropped by the INSERT
+itself. A payment that is already settled is recognised with one indexed
+read, without taking row locks.
+"""
+import hashlib
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import WebhookEvent
+
+logger = logging.getLogger(__name__)
+
+HANDLED_EVENTS = {"charge.success"}
+
+
+def _event_key(payload, body):
+    data = payload.get("data") or {}
+    delivery_id = data.get("id") or data.get("reference")
+    if delivery_id is None:
+        return f"sha256:{hashlib.sha256(body).hexdigest()}"
+    return f"{payload.get('event')}:{delivery_id}"
+
+
+def record_delivery(payload, body):
+    """Store a verified webhook ``payload`` (raw ``body``) unless it was already stored."""
+    event_type = payload.get("event") or ""
+    WebhookEvent.objects.bulk_create(
+        [
+            WebhookEvent(
+                event_key=_event_key(payload, body),
+                event_type=event_type,
+                reference=(payload.get("data") or {}).get("reference") or "",
+                payload=payload,
+                status="pending" if event_type in HANDLED_EVENTS else "ignored",
+            )
+        ],
+        ignore_conflicts=True,
+    )
+
+
+def _retry_delay(attempts):
+    delay = settings.WEBHOOK_RETRY_BASE_SECONDS * (2 ** (attempts - 1))
+    return timedelta(seconds=min(delay, settings.WEBHOOK_RETRY_MAX_SECONDS))
+
+
+def _claim_batch(batch_size):
+    # Same lease scheme as the notification outbox: rows held by a crashed
+    # consumer become due again once the lease runs out.
+    now = timezone.now()
+    with transaction.atomic():
+        batch = list(
+            WebhookEvent.objects.select_for_update(skip_locked=True)
+            .filter(status="pending", next_attempt_at__lte=now)
+            .order_by("next_attempt_at")[:batch_size]
+        )
+        if batch:
+            lease = now + timedelta(seconds=settings.WEBHOOK_LEASE_SECONDS)
+            WebhookEvent.objects.filter(id__in=[e.id for e in batch]).update(next_attempt_at=lease)
+    return batch
+
+
+def process_inbox(batch_size=None):
+    """Act on one batch of pending deliveries.
+
+    Returns a dict with the number of deliveries processed, skipped as
+    repeats of a reference earlier in the batch, and failed. Deliveries for
+    an order that is already paid cost ``_finalize_ticket_payment`` one
+    indexed read and no locks.
+    """
+    from .views import _finalize_ticket_payment  # views imports this module
+
+    batch = _claim_batch(batch_size or settings.WEBHOOK_BATCH_SIZE)
+    counts = {"processed": 0, "skipped": 0, "failed": 0}
+    seen = set()
+    for delivery in batch:
+        now = timezone.now()
+        try:
+            if not delivery.reference or delivery.reference in seen:
+                counts["skipped"] += 1
+            else:
+                _finalize_ticket_payment(delivery.reference, notify=True)
+                counts["processed"] += 1
+            seen.add(delivery.reference)
+            delivery.status = "processed"
+            delivery.processed_at = now
+        except Exception as e:
+            logger.warning("Webhook %s for %s failed: %s", delivery.event_key, delivery.reference, e)
+            delivery.attempts += 1
+            delivery.last_error = str(e)
+            if delivery.attempts >= settings.WEBHOOK_MAX_ATTEMPTS:
+                delivery.status = "failed"
+            else:
+                delivery.next_attempt_at = now + _retry_delay(delivery.attempts)
+            counts["failed"] += 1
+
+    WebhookEvent.objects.bulk_update(
+        batch,
+        ["status", "attempts", "next_attempt_at", "last_error", "processed_at"],
+    )
+    return counts
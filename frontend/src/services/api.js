@@ -1,3 +1,5 @@
+import { userStore } from '../store/userStore.js';
+
 const RAW_API_URL = import.meta.env.VITE_API_URL || 'https://ticketing-1-backend.onrender.com/api';
 export const API_URL = RAW_API_URL.replace(/\/$/, '');
 export const API_BASE_URL = API_URL.replace(/\/api\/?$/, '');
@@ -62,7 +64,28 @@ export const fetchEventDetails = async (id) => {
     return response.json();
 };
 
+const sleep = (ms) => new Promise((resolve) => setTimeout(resolve, ms));
+
+// Waits our turn in the event's waiting room and returns the admission
+// token initialize-payment needs. Events without a waiting room admit
+// straight away. onQueue(status) is called while waiting.
+export const waitForAdmission = async (eventId, onQueue) => {
+    const joined = await fetch(`${API_URL}/events/${eventId}/queue/`, { method: 'POST' });
+    if (!joined.ok) throw new Error(await parseErrorMessage(joined, 'Failed to join the queue'));
+    let status = await joined.json();
+    const queueToken = status.queue_token;
+    while (!status.admitted) {
+        if (onQueue) onQueue(status);
+        await sleep(Math.max(status.poll_after, 1) * 1000);
+        const response = await fetch(`${API_URL}/events/${eventId}/queue/?token=${encodeURIComponent(queueToken)}`);
+        if (!response.ok) throw new Error(await parseErrorMessage(response, 'Lost our place in the queue'));
+        status = await response.json();
+    }
+    return status.admission_token;
+};
+
 export const initializePayment = async (ticketData) => {
+    const admissionToken = await waitForAdmission(ticketData.eventUuid, ticketData.onQueue);
     const formData = new FormData();
     formData.append('event', ticketData.eventUuid);
     formData.append('ticket_type', ticketData.ticketTypeUuid);
@@ -76,8 +99,13 @@ export const initializePayment = async (ticketData) => {
         formData.append('picture', ticketData.attendee.pictureFile);
     }
 
+    const headers = { 'X-Admission-Token': admissionToken };
+    const user = userStore.getState();
+    if (user.isAuthed) headers.Authorization = `Bearer ${user.accessToken}`;
+
     const response = await fetch(`${API_URL}/tickets/initialize-payment/`, {
         method: 'POST',
+        headers,
         body: formData,
     });
 
@@ -148,6 +176,26 @@ export const fetchAllTickets = async () => {
     return response.json();
 };
 
+// The signed-in buyer's tickets, grouped by event. Each call revalidates
+// with the ETag of the last response, so polling an unchanged wallet costs
+// a 304 and returns the copy we already have. The copy is dropped whenever
+// a buyer signs in or out, so it is never shown to the next one.
+let wallet = null;
+userStore.subscribe(() => {
+    wallet = null;
+});
+
+export const fetchMyTickets = async () => {
+    const headers = { Authorization: `Bearer ${userStore.getState().accessToken}` };
+    if (wallet) headers['If-None-Match'] = wallet.etag;
+    const response = await fetch(`${API_URL}/me/tickets/`, { headers });
+    if (response.status === 304 && wallet) return wallet.data;
+    if (!response.ok) throw new Error(await parseErrorMessage(response, 'Failed to fetch your tickets'));
+    const data = await response.json();
+    wallet = { etag: response.headers.get('ETag'), data };
+    return data;
+};
+
 export const saveEvent = async (eventData, mode = 'new') => {
     const method = mode === 'new' ? 'POST' : 'PATCH';
     const url = mode === 'new' ? `${API_URL}/events/` : `${API_URL}/events/${eventData.id}/`;